@@ -0,0 +1,239 @@
+import math
+import operator
+import os
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from itertools import compress, repeat
+from typing import Any, Dict, Iterable, List, Optional
+from models import QuizResult
+from storage import QuizStorage
+
+NUM_OPTIONS = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quiz_stats (
+    quiz_id TEXT PRIMARY KEY,
+    n INTEGER NOT NULL,
+    sum_total INTEGER NOT NULL,
+    sum_sq_total INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS item_stats (
+    quiz_id TEXT NOT NULL,
+    item INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    sum_total_correct INTEGER NOT NULL,
+    option_0 INTEGER NOT NULL,
+    option_1 INTEGER NOT NULL,
+    option_2 INTEGER NOT NULL,
+    option_3 INTEGER NOT NULL,
+    PRIMARY KEY (quiz_id, item)
+);
+CREATE TABLE IF NOT EXISTS results_seen (
+    partition TEXT PRIMARY KEY,
+    seen INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+class ItemAnalytics:
+    """Per-question difficulty, discrimination and distractor statistics.
+
+    Keeps running sums per question in a SQLite database next to the quiz store.
+    Once attached to a storage, every batch of saved results is folded into the
+    sums by a result listener, so reports never rescan history; only the first
+    report (or --rebuild) recomputes everything. Results from every user partition
+    count towards the same per-question statistics. Every statistic is derived
+    from these sums:
+      - difficulty (p-value): share of attempts answering the question correctly
+      - discrimination: point-biserial correlation of item correctness with total score
+      - distractor frequencies: share of attempts choosing each option
+    """
+
+    def __init__(self, storage: Optional[QuizStorage] = None):
+        self.storage = storage or QuizStorage()
+        self.filepath = os.path.join(os.path.dirname(self.storage.filepath), "analytics.db")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def attach(self) -> "ItemAnalytics":
+        """Fold in the results saved through the storage or any of its partitions."""
+        self.storage.add_result_listener(self._on_results_saved)
+        return self
+
+    def is_built(self) -> bool:
+        """Whether the statistics cover the full history (otherwise call recompute)."""
+        with self._transaction() as conn:
+            return self._is_built(conn)
+
+    def update(self, results: Iterable[QuizResult]):
+        """Fold results into the running sums."""
+        results = list(results)
+        keys = self._answer_keys({r.quiz_id for r in results})
+        with self._transaction() as conn:
+            self._fold(conn, results, keys)
+
+    def recompute(self) -> int:
+        """Rebuild every statistic from the full result history. Returns results processed."""
+        results, seen = [], {}
+        for partition in self._partitions():
+            partition_results = partition.get_results_from(0)
+            seen[partition.user or ""] = len(partition_results)
+            results.extend(partition_results)
+        keys = self._answer_keys({r.quiz_id for r in results})
+
+        by_quiz: Dict[str, List[QuizResult]] = defaultdict(list)
+        for result in results:
+            key = keys.get(result.quiz_id)
+            if key is not None and len(result.user_answers) == len(key):
+                by_quiz[result.quiz_id].append(result)
+
+        quiz_rows, item_rows = [], []
+        for quiz_id, quiz_results in by_quiz.items():
+            key = keys[quiz_id]
+            totals = [r.score for r in quiz_results]
+            quiz_rows.append((quiz_id, len(totals), sum(totals), sum(map(operator.mul, totals, totals))))
+
+            # Work column by column over the answer matrix so the inner loops stay in C
+            columns = zip(*(r.user_answers for r in quiz_results))
+            for item, (column, correct_index) in enumerate(zip(columns, key)):
+                flags = list(map(operator.eq, column, repeat(correct_index)))
+                counts = Counter(column)
+                item_rows.append((quiz_id, item, sum(flags), sum(compress(totals, flags)),
+                                  *(counts.get(i, 0) for i in range(NUM_OPTIONS))))
+
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM quiz_stats")
+            conn.execute("DELETE FROM item_stats")
+            conn.execute("DELETE FROM results_seen")
+            conn.executemany("INSERT INTO quiz_stats VALUES (?, ?, ?, ?)", quiz_rows)
+            conn.executemany("INSERT INTO item_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?)", item_rows)
+            conn.executemany("INSERT INTO results_seen VALUES (?, ?)", seen.items())
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('built', '1')")
+        return len(results)
+
+    def report(self, quiz_id: str) -> Optional[Dict[str, Any]]:
+        """Get the statistics for every question of a quiz, or None if it has no results."""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT n, sum_total, sum_sq_total FROM quiz_stats WHERE quiz_id = ?",
+                               (quiz_id,)).fetchone()
+            item_rows = conn.execute("SELECT * FROM item_stats WHERE quiz_id = ? ORDER BY item",
+                                     (quiz_id,)).fetchall()
+        if not row or not row[0]:
+            return None
+
+        n, sum_total, sum_sq_total = row
+        mean = sum_total / n
+        variance = max(sum_sq_total / n - mean * mean, 0.0)
+        std = math.sqrt(variance)
+
+        items = []
+        for _, _, correct, sum_total_correct, *option_counts in item_rows:
+            p_value = correct / n
+            discrimination = None
+            if std > 0 and 0 < correct < n:
+                mean_correct = sum_total_correct / correct
+                mean_incorrect = (sum_total - sum_total_correct) / (n - correct)
+                discrimination = (mean_correct - mean_incorrect) / std * math.sqrt(p_value * (1 - p_value))
+            items.append({
+                "p_value": p_value,
+                "discrimination": discrimination,
+                "option_frequencies": [count / n for count in option_counts],
+            })
+
+        return {"attempts": n, "mean_score": mean, "items": items}
+
+    def _on_results_saved(self, partition: QuizStorage, results: List[QuizResult], position: int):
+        """Result listener: runs with the partition locked, so saves arrive in order."""
+        name = partition.user or ""
+        with self._transaction() as conn:
+            if not self._is_built(conn):
+                return  # The first report recomputes everything, these results included
+            row = conn.execute("SELECT seen FROM results_seen WHERE partition = ?", (name,)).fetchone()
+            seen = row[0] if row else 0
+            if seen > position:
+                # The results file was reset or rewritten underneath us
+                conn.execute("DELETE FROM meta WHERE key = 'built'")
+                return
+
+        if seen < position:
+            # Saves made without this listener attached: catch up from the cached file
+            results = partition.get_results_from(seen)
+        # Read the catalog before taking the database lock; the caller may hold the catalog's
+        keys = self._answer_keys({r.quiz_id for r in results})
+        with self._transaction() as conn:
+            self._fold(conn, results, keys)
+            conn.execute("INSERT OR REPLACE INTO results_seen VALUES (?, ?)", (name, seen + len(results)))
+
+    @staticmethod
+    def _fold(conn: sqlite3.Connection, results: List[QuizResult], keys: Dict[str, List[int]]):
+        """Add a batch to the sums with one upsert per touched quiz and question."""
+        quiz_deltas: Dict[str, List[int]] = {}
+        item_deltas: Dict[tuple, List[int]] = {}
+
+        for result in results:
+            key = keys.get(result.quiz_id)
+            if key is None or len(result.user_answers) != len(key):
+                continue
+
+            total = result.score
+            quiz = quiz_deltas.setdefault(result.quiz_id, [0, 0, 0])
+            quiz[0] += 1
+            quiz[1] += total
+            quiz[2] += total * total
+            for item, (answer, correct_index) in enumerate(zip(result.user_answers, key)):
+                delta = item_deltas.setdefault((result.quiz_id, item), [0] * (2 + NUM_OPTIONS))
+                if answer == correct_index:
+                    delta[0] += 1
+                    delta[1] += total
+                if 0 <= answer < NUM_OPTIONS:
+                    delta[2 + answer] += 1
+
+        conn.executemany(
+            "INSERT INTO quiz_stats VALUES (?, ?, ?, ?) ON CONFLICT (quiz_id) DO UPDATE SET "
+            "n = n + excluded.n, sum_total = sum_total + excluded.sum_total, "
+            "sum_sq_total = sum_sq_total + excluded.sum_sq_total",
+            [(quiz_id, *delta) for quiz_id, delta in quiz_deltas.items()]
+        )
+        conn.executemany(
+            "INSERT INTO item_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (quiz_id, item) DO UPDATE SET "
+            "correct = correct + excluded.correct, "
+            "sum_total_correct = sum_total_correct + excluded.sum_total_correct, "
+            "option_0 = option_0 + excluded.option_0, option_1 = option_1 + excluded.option_1, "
+            "option_2 = option_2 + excluded.option_2, option_3 = option_3 + excluded.option_3",
+            [(quiz_id, item, *delta) for (quiz_id, item), delta in item_deltas.items()]
+        )
+
+    @staticmethod
+    def _is_built(conn: sqlite3.Connection) -> bool:
+        return conn.execute("SELECT 1 FROM meta WHERE key = 'built'").fetchone() is not None
+
+    @contextmanager
+    def _transaction(self):
+        """One write transaction on a lazily opened connection shared by this object's threads."""
+        with self._lock:
+            if self._conn is None:
+                os.makedirs(os.path.dirname(self.filepath) or ".", exist_ok=True)
+                self._conn = sqlite3.connect(self.filepath, timeout=30, isolation_level=None,
+                                             check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.executescript(SCHEMA)
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _partitions(self) -> List[QuizStorage]:
+        """The shared results file plus every user's partition."""
+        return [self.storage.for_user(None)] + [self.storage.for_user(u) for u in self.storage.list_users()]
+
+    def _answer_keys(self, quiz_ids) -> Dict[str, List[int]]:
+        quizzes = self.storage.get_quizzes_by_ids(quiz_ids)
+        return {quiz_id: [q.correct_index for q in quiz.questions] for quiz_id, quiz in quizzes.items()}
@@ -0,0 +1,81 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+import click
+from models import Question, Quiz, QuizResult
+from storage import QuizStorage
+
+def _writer(filepath: str, user, writes: int, start_event):
+    """Save `writes` results one at a time, as a single simulated user would."""
+    storage = QuizStorage(filepath, user)
+    start_event.wait()
+    for i in range(writes):
+        storage.save_result(QuizResult(
+            quiz_id="bench",
+            user_answers=[i % 4] * 5,
+            score=i % 6,
+            total_questions=5,
+            completed_at=datetime.now()
+        ))
+
+def run_benchmark(shards: int, writers: int, writes: int) -> float:
+    """Run `writers` processes spread over `shards` user partitions and return writes/s.
+    shards=0 means every writer shares the catalog file (no user partitions)."""
+    directory = tempfile.mkdtemp(prefix="quiz-bench-")
+    try:
+        filepath = os.path.join(directory, "quizzes.json")
+        QuizStorage(filepath).save_quiz(Quiz(
+            id="bench",
+            topic="Benchmark",
+            questions=[Question("Q?", ["A", "B", "C", "D"], 0, "Because.") for _ in range(5)],
+            created_at=datetime.now()
+        ))
+
+        start_event = multiprocessing.Event()
+        processes = [
+            multiprocessing.Process(
+                target=_writer,
+                args=(filepath, f"user{i % shards}" if shards else None, writes, start_event)
+            )
+            for i in range(writers)
+        ]
+        for process in processes:
+            process.start()
+
+        start = time.perf_counter()
+        start_event.set()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        saved = sum(QuizStorage(filepath, user).count_results()
+                    for user in QuizStorage(filepath).list_users() or [None])
+        if saved != writers * writes:
+            raise RuntimeError(f"Expected {writers * writes} saved results, found {saved}")
+        return saved / elapsed
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+@click.command()
+@click.option('--writers', default=16, help='Concurrent writer processes (simulated users)')
+@click.option('--writes', default=100, help='Results saved by each writer')
+@click.option('--shards', default='0,1,2,4,8,16', help='Comma-separated partition counts; 0 = shared file')
+def main(writers, writes, shards):
+    """Measure result write throughput as users are spread over more partitions."""
+    counts = [int(s) for s in shards.split(',')]
+    click.echo(f"\n📊 {writers} writers x {writes} results each")
+    click.echo(f"{'Partitions':>12} {'Writes/s':>12} {'Speedup':>10}")
+    click.echo("-" * 36)
+
+    baseline = None
+    for count in counts:
+        rate = run_benchmark(count, writers, writes)
+        baseline = baseline or rate
+        label = "shared" if count == 0 else str(count)
+        click.echo(f"{label:>12} {rate:>12,.0f} {rate / baseline:>9.1f}x")
+
+if __name__ == '__main__':
+    main()
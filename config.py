@@ -6,6 +6,7 @@ load_dotenv()  # Load environment variables from .env file
 class Config:
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
     DATA_FILE = "data/quizzes.json"
+    USER = os.getenv("QUIZ_USER")  # Default user partition; None keeps results in DATA_FILE
     
     @classmethod
     def validate(cls):
@@ -0,0 +1,274 @@
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from quiz_generator import QuizGenerator
+from storage import QuizStorage
+
+DEFAULT_VISIBILITY_TIMEOUT = 300.0  # seconds a leased job stays invisible to other workers
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 5.0  # seconds; doubles with every failed attempt
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    num_questions INTEGER NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_expires_at REAL,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    quiz_id TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, priority DESC, created_at);
+"""
+
+@dataclass
+class Job:
+    id: str
+    topic: str
+    num_questions: int
+    priority: int
+    status: str  # queued, leased, done or dead
+    attempts: int
+    max_attempts: int
+    available_at: float
+    lease_expires_at: Optional[float]
+    worker: Optional[str]
+    created_at: float
+    started_at: Optional[float]
+    finished_at: Optional[float]
+    quiz_id: Optional[str]
+    error: Optional[str]
+
+class JobQueue:
+    """Durable SQLite queue of quiz generation requests.
+
+    Workers lease the highest-priority ready job for a visibility timeout. A job whose
+    lease expires (the worker crashed or was killed) becomes visible again; failed
+    jobs are retried with exponential backoff until max_attempts, then dead-lettered.
+    """
+
+    def __init__(self, path: Optional[str] = None, storage: Optional[QuizStorage] = None):
+        if path is None:
+            storage = storage or QuizStorage()
+            path = os.path.join(os.path.dirname(storage.filepath), "jobs.db")
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def enqueue(self, topic: str, num_questions: int = 5, priority: int = 0,
+                max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> str:
+        """Add a generation request and return its job ID."""
+        QuizGenerator.validate_request(topic, num_questions)
+        job_id = str(uuid.uuid4())[:8]
+        now = time.time()
+        self._conn.execute(
+            "INSERT INTO jobs (id, topic, num_questions, priority, status, max_attempts, "
+            "available_at, created_at) VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+            (job_id, topic, num_questions, priority, max_attempts, now, now)
+        )
+        return job_id
+
+    def lease(self, worker: str, visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT) -> Optional[Job]:
+        """Claim the next ready job for `worker`, or return None if there is none."""
+        now = time.time()
+        with self._transaction():
+            # Jobs whose last allowed attempt timed out go straight to the dead letters
+            self._conn.execute(
+                "UPDATE jobs SET status = 'dead', finished_at = ?, error = 'Lease expired on final attempt' "
+                "WHERE status = 'leased' AND lease_expires_at < ? AND attempts >= max_attempts",
+                (now, now)
+            )
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE (status = 'queued' AND available_at <= ?) "
+                "OR (status = 'leased' AND lease_expires_at < ?) "
+                "ORDER BY priority DESC, created_at LIMIT 1",
+                (now, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status = 'leased', attempts = attempts + 1, worker = ?, "
+                "lease_expires_at = ?, started_at = COALESCE(started_at, ?) WHERE id = ?",
+                (worker, now + visibility_timeout, now, row["id"])
+            )
+        return self.get(row["id"])
+
+    def complete(self, job_id: str, worker: str, quiz_id: str) -> bool:
+        """Mark a leased job done. Returns False if the lease was lost to another worker."""
+        cursor = self._conn.execute(
+            "UPDATE jobs SET status = 'done', finished_at = ?, quiz_id = ?, error = NULL "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (time.time(), quiz_id, job_id, worker)
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: str, worker: str, error: str, retryable: bool = True) -> Optional[str]:
+        """Record a failed attempt. Returns the job's new status, or None if the lease was lost."""
+        with self._transaction():
+            row = self._conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND worker = ? AND status = 'leased'",
+                (job_id, worker)
+            ).fetchone()
+            if row is None:
+                return None
+
+            now = time.time()
+            if retryable and row["attempts"] < row["max_attempts"]:
+                delay = RETRY_BASE_DELAY * 2 ** (row["attempts"] - 1)
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', available_at = ?, lease_expires_at = NULL, "
+                    "error = ? WHERE id = ?",
+                    (now + delay, error, job_id)
+                )
+                return "queued"
+            self._conn.execute(
+                "UPDATE jobs SET status = 'dead', finished_at = ?, error = ? WHERE id = ?",
+                (now, error, job_id)
+            )
+            return "dead"
+
+    def release(self, job_id: str, worker: str):
+        """Hand a leased job back untouched, e.g. when a worker shuts down mid-job."""
+        self._conn.execute(
+            "UPDATE jobs SET status = 'queued', attempts = attempts - 1, available_at = ?, "
+            "lease_expires_at = NULL WHERE id = ? AND worker = ? AND status = 'leased'",
+            (time.time(), job_id, worker)
+        )
+
+    def retry_dead(self) -> int:
+        """Move every dead-lettered job back to the queue with fresh attempts."""
+        cursor = self._conn.execute(
+            "UPDATE jobs SET status = 'queued', attempts = 0, available_at = ?, finished_at = NULL "
+            "WHERE status = 'dead'",
+            (time.time(),)
+        )
+        return cursor.rowcount
+
+    def get(self, job_id: str) -> Optional[Job]:
+        row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job(**dict(row)) if row else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth per status plus wait and end-to-end latency of finished jobs."""
+        now = time.time()
+        counts = {status: 0 for status in ("queued", "leased", "done", "dead")}
+        for row in self._conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"):
+            counts[row["status"]] = row["n"]
+
+        oldest = self._conn.execute(
+            "SELECT MIN(created_at) AS t FROM jobs WHERE status = 'queued'"
+        ).fetchone()["t"]
+        waits = [r[0] for r in self._conn.execute(
+            "SELECT started_at - created_at FROM jobs WHERE status = 'done' ORDER BY 1")]
+        latencies = [r[0] for r in self._conn.execute(
+            "SELECT finished_at - created_at FROM jobs WHERE status = 'done' ORDER BY 1")]
+
+        return {
+            "counts": counts,
+            "depth": counts["queued"] + counts["leased"],
+            "oldest_queued_age": now - oldest if oldest is not None else None,
+            "wait": _summarize(waits),
+            "latency": _summarize(latencies),
+        }
+
+    def close(self):
+        self._conn.close()
+
+    def _transaction(self):
+        return _ImmediateTransaction(self._conn)
+
+class _ImmediateTransaction:
+    """BEGIN IMMEDIATE takes the write lock up front, so two workers can never lease the same job."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def __enter__(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, exc, tb):
+        self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+class JobWorker:
+    """Leases generation jobs one at a time and runs them with a single QuizGenerator."""
+
+    def __init__(self, queue: JobQueue, generator: QuizGenerator, name: Optional[str] = None,
+                 visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT):
+        self.queue = queue
+        self.generator = generator
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.visibility_timeout = visibility_timeout
+
+    def run(self, poll_interval: float = 1.0, drain: bool = False, stop_event=None) -> int:
+        """Process jobs until stopped (or, with drain, until none are ready). Returns jobs handled."""
+        handled = 0
+        while stop_event is None or not stop_event.is_set():
+            if self.process_one():
+                handled += 1
+            elif drain:
+                break
+            else:
+                time.sleep(poll_interval)
+        return handled
+
+    def process_one(self) -> bool:
+        """Lease and run one job. Returns False if no job was ready."""
+        job = self.queue.lease(self.name, self.visibility_timeout)
+        if job is None:
+            return False
+
+        print(f"[{self.name}] ▶️  Job {job.id}: '{job.topic}' (attempt {job.attempts}/{job.max_attempts})")
+        try:
+            quiz = self.generator.generate_quiz(job.topic, job.num_questions)
+        except KeyboardInterrupt:
+            self.queue.release(job.id, self.name)
+            raise
+        except ValueError as e:
+            # Invalid topics will not get better by retrying
+            self.queue.fail(job.id, self.name, str(e), retryable=False)
+            print(f"[{self.name}] ❌ Job {job.id} rejected: {e}")
+        except Exception as e:
+            status = self.queue.fail(job.id, self.name, str(e))
+            print(f"[{self.name}] ⚠️  Job {job.id} failed ({status}): {e}")
+        else:
+            if self.queue.complete(job.id, self.name, quiz.id):
+                print(f"[{self.name}] ✅ Job {job.id} done: quiz {quiz.id}")
+            else:
+                print(f"[{self.name}] ⚠️  Job {job.id} lease expired before completion")
+        return True
+
+def run_worker(queue_path: str, catalog_path: str, visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT,
+               poll_interval: float = 1.0, drain: bool = False) -> int:
+    """Process entry point: every worker opens its own database connection and AI client."""
+    queue = JobQueue(queue_path)
+    try:
+        generator = QuizGenerator(QuizStorage(catalog_path))
+        return JobWorker(queue, generator, visibility_timeout=visibility_timeout).run(poll_interval, drain)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        queue.close()
+
+def _summarize(values: List[float]) -> Optional[Dict[str, float]]:
+    """Mean and percentiles of an ascending list of durations."""
+    if not values:
+        return None
+    def pct(p):
+        return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+    return {"mean": sum(values) / len(values), "p50": pct(50), "p95": pct(95), "max": values[-1]}
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import time
+from typing import List, Optional
+from urllib.parse import urlsplit
+import click
+
+async def _worker(host: str, port: int, request: bytes, count: int,
+                  latencies: List[float], errors: List[str]):
+    """Send `count` requests over one keep-alive connection, recording latencies."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(count):
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.strip().lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+
+            status = int(status_line.split()[1]) if status_line else 0
+            if status >= 400 or status == 0:
+                errors.append(status_line.decode("latin-1").strip() or "connection closed")
+    finally:
+        writer.close()
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+async def run_load_test(url: str, method: str, body: Optional[str],
+                        total_requests: int, concurrency: int):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    path = parts.path or "/"
+    if parts.query:
+        path += f"?{parts.query}"
+
+    payload = body.encode("utf-8") if body else b""
+    request = (
+        f"{method} {path} HTTP/1.1\r\n"
+        f"Host: {host}:{port}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        f"\r\n"
+    ).encode("latin-1") + payload
+
+    latencies: List[float] = []
+    errors: List[str] = []
+    per_worker = [total_requests // concurrency] * concurrency
+    for i in range(total_requests % concurrency):
+        per_worker[i] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _worker(host, port, request, count, latencies, errors)
+        for count in per_worker if count
+    ))
+    elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+@click.command()
+@click.option('--url', default='http://127.0.0.1:8000/stats', help='Endpoint to hit')
+@click.option('--method', default='GET', help='HTTP method (default: GET)')
+@click.option('--body', default=None, help='JSON request body for POST requests')
+@click.option('--requests', 'total_requests', default=1000, help='Total requests to send')
+@click.option('--concurrency', default=20, help='Concurrent keep-alive connections')
+def main(url, method, body, total_requests, concurrency):
+    """Load-test a running `quiz serve` instance and report throughput and latency."""
+    if body:
+        json.loads(body)  # Fail fast on malformed payloads
+
+    latencies, errors, elapsed = asyncio.run(
+        run_load_test(url, method.upper(), body, total_requests, concurrency)
+    )
+    if not latencies:
+        click.echo("❌ No requests completed")
+        return
+
+    latencies.sort()
+    click.echo(f"\n📊 {method.upper()} {url}")
+    click.echo(f"   Requests:    {len(latencies)} ({len(errors)} errors)")
+    click.echo(f"   Concurrency: {concurrency}")
+    click.echo(f"   Duration:    {elapsed:.2f}s")
+    click.echo(f"   Throughput:  {len(latencies) / elapsed:.1f} req/s")
+    for pct in (50, 90, 99):
+        click.echo(f"   p{pct}:         {_percentile(latencies, pct) * 1000:.2f} ms")
+    click.echo(f"   max:         {latencies[-1] * 1000:.2f} ms")
+    if errors:
+        click.echo(f"   First error: {errors[0]}")
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,18 @@
+import asyncio
 import click
+import json
+import os
 import sys
+import time
 from datetime import datetime
+from config import Config
 from quiz_generator import QuizGenerator
 from quiz_engine import QuizEngine
-from storage import QuizStorage
+from analytics import ItemAnalytics
+from scheduler import ReviewScheduler
+from storage import QuizStorage, fetch_page, validate_user
+
+DATE_FORMATS = ['%Y-%m-%d', '%Y-%m-%d %H:%M']
 
 def print_banner():
     """Print application banner."""
@@ -14,10 +23,57 @@ def print_banner():
     ╚═══════════════════════════════════════════════════════╝
     """)
 
+def current_storage() -> QuizStorage:
+    """Storage for the user selected with the global --user option."""
+    return click.get_current_context().find_root().obj
+
+def _check_user(ctx, param, value):
+    try:
+        return validate_user(value) if value else None
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+def _print_profile(summary):
+    from profiling import format_bytes
+    
+    click.echo(f"\n⏱️  PROFILE ({summary['mode']} mode)")
+    click.echo("="*60)
+    memory = "unavailable" if summary["peak_memory"] is None else format_bytes(summary["peak_memory"])
+    click.echo(f"🕐 Wall time: {summary['elapsed']:.3f}s   🧠 Peak memory: {memory}"
+               f"{' (RSS)' if summary['mode'] == 'sample' else ''}")
+    click.echo("🔥 Slowest functions (cumulative):")
+    # Click's dispatch frames wrap every command and say nothing about it
+    hotspots = [row for row in summary["hotspots"]
+                if not row[0].startswith(os.path.dirname(click.__file__)) and "(<module>)" not in row[0]]
+    for location, own, cumulative, calls in hotspots[:5]:
+        click.echo(f"   {cumulative:8.3f}s  {location} ({calls:,} {'calls' if summary['mode'] == 'trace' else 'samples'})")
+    if summary["allocations"]:
+        click.echo("📦 Top allocation sites:")
+        for location, size, count in summary["allocations"][:3]:
+            click.echo(f"   {format_bytes(size):>10}  {location}")
+    click.echo(f"🧰 Profiler teardown: {summary['teardown']:.3f}s (not included above)")
+    click.echo(f"📄 Full report: {summary['report_path']}")
+
 @click.group(invoke_without_command=True)
+@click.option('--user', default=Config.USER, callback=_check_user,
+              help='Keep results in this user\'s own partition (default: $QUIZ_USER)')
+@click.option('--profile', is_flag=True, help='Profile CPU time and memory of the command and save a report')
+@click.option('--profile-mode', type=click.Choice(['trace', 'sample']), default='trace',
+              help='trace: exact cProfile call stats; sample: low-overhead stack sampling for long runs')
 @click.pass_context
-def cli(ctx):
+def cli(ctx, user, profile, profile_mode):
     """AI Quiz Generator - Create and take quizzes on any topic!"""
+    ctx.obj = QuizStorage(user=user)
+    # Every result saved through this storage, for any user, updates that user's schedule
+    ReviewScheduler.track(ctx.obj)
+    ItemAnalytics(ctx.obj).attach()
+    if profile:
+        from profiling import CommandProfiler
+        
+        profiler = CommandProfiler(profile_mode, os.path.join(os.path.dirname(ctx.obj.filepath), "profiles"))
+        profiler.start()
+        # Runs once the subcommand returns, even if it fails
+        ctx.call_on_close(lambda: _print_profile(profiler.stop(ctx.invoked_subcommand)))
     if ctx.invoked_subcommand is None:
         print_banner()
         click.echo("✨ Available commands:\n")
@@ -25,19 +81,43 @@ def cli(ctx):
         click.echo("  🎯 take       - Take a quiz")
         click.echo("  📊 history    - View quiz history")
         click.echo("  📖 review     - Review past results")
+        click.echo("  🧠 practice   - Practice questions you missed")
         click.echo("  📈 stats      - View statistics")
+        click.echo("  🧮 grade      - Grade answers in bulk")
+        click.echo("  🔬 analyze    - Per-question item analysis")
+        click.echo("  📤 export     - Export quizzes or results")
+        click.echo("  📥 import     - Import quizzes or results")
+        click.echo("  🌐 serve      - Run the HTTP API server")
+        click.echo("  ⚙️  worker     - Process queued quiz generations")
+        click.echo("  📬 jobs       - Show the generation queue")
         click.echo("  ❓ help       - Show this help")
         click.echo("\n💡 Try 'quiz generate --topic \"Ancient Rome\"' to get started!")
 
 @cli.command()
 @click.option('--topic', prompt='📚 Enter a topic for the quiz', help='Topic for quiz generation')
 @click.option('--questions', default=5, help='Number of questions (default: 5)')
-def generate(topic, questions):
+@click.option('--async', 'run_async', is_flag=True, help='Queue the quiz for a background worker and return a job ID')
+@click.option('--priority', default=0, help='Queue priority with --async; higher runs first (default: 0)')
+def generate(topic, questions, run_async, priority):
     """Generate a new quiz on a topic"""
+    if run_async:
+        from jobs import JobQueue
+        
+        try:
+            job_id = JobQueue(storage=current_storage()).enqueue(topic, questions, priority=priority)
+        except ValueError as e:
+            click.echo(f"❌ Error: {e}")
+            return
+        click.echo(f"📬 Queued {questions}-question quiz about '{topic}'")
+        click.echo(f"   🆔 Job ID: {job_id}")
+        click.echo(f"💡 Run 'quiz worker' to process the queue and 'quiz jobs --id {job_id}' to check on it.")
+        return
+    
     try:
         click.echo(f"\n🎨 Generating {questions}-question quiz about '{topic}'...")
         
-        generator = QuizGenerator()
+        storage = current_storage()
+        generator = QuizGenerator(storage)
         quiz = generator.generate_quiz(topic, num_questions=questions)
         
         click.echo(f"✅ Quiz generated successfully!")
@@ -48,7 +128,7 @@ def generate(topic, questions):
         
         click.echo(f"\n🎯 Would you like to take this quiz now?")
         if click.confirm("   Take quiz now?", default=True):
-            engine = QuizEngine()
+            engine = QuizEngine(storage)
             result = engine.take_quiz(quiz.id)
             if result:
                 click.echo(f"\n✅ Quiz completed! Result saved.")
@@ -59,15 +139,17 @@ def generate(topic, questions):
 
 @cli.command()
 @click.option('--quiz-id', help='Specific quiz ID to take')
-def take(quiz_id):
+@click.option('--page', default=1, type=click.IntRange(min=1), help='Page of recent quizzes to choose from (default: 1)')
+@click.option('--since', type=click.DateTime(DATE_FORMATS), help='Only list quizzes created since this date')
+def take(quiz_id, page, since):
     """Take a quiz"""
-    engine = QuizEngine()
-    storage = QuizStorage()
-    generator = QuizGenerator()
+    storage = current_storage()
+    engine = QuizEngine(storage)
+    generator = QuizGenerator(storage)
     
     if not quiz_id:
         # Show recent quizzes to choose from
-        quizzes = storage.get_recent_quizzes(5)
+        quizzes = fetch_page(storage.query_quizzes, page, limit=5, since=since).items
         
         if not quizzes:
             click.echo("\n📭 No quizzes found. Generate one first!")
@@ -89,20 +171,21 @@ def take(quiz_id):
             if 1 <= choice <= len(quizzes):
                 quiz_id = quizzes[choice-1].id
             elif choice == len(quizzes) + 1:
-                # Show all quizzes
-                all_quizzes = storage.get_all_quizzes()
+                # Search quizzes by topic, newest first
+                search = click.prompt("🔍 Topic contains (leave empty for all)", default="", show_default=False)
+                all_quizzes = storage.query_quizzes(limit=20, topic=search.strip() or None, since=since).items
                 if not all_quizzes:
                     click.echo("📭 No quizzes found!")
                     return
                 
-                click.echo("\n📚 All Quizzes:")
+                click.echo("\n📚 Matching Quizzes:")
                 click.echo("="*60)
                 for i, quiz in enumerate(all_quizzes, 1):
                     click.echo(f"{i}. {quiz.topic} (ID: {quiz.id})")
                 
                 sub_choice = click.prompt("\nSelect a quiz (number) or '0' to cancel", type=int)
-                if 1 <= sub_choice <= len(all_quizzes[-20:]):
-                    quiz_id = all_quizzes[-20:][sub_choice-1].id
+                if 1 <= sub_choice <= len(all_quizzes):
+                    quiz_id = all_quizzes[sub_choice-1].id
                 else:
                     click.echo("Returning to main menu...")
                     return
@@ -134,52 +217,92 @@ def take(quiz_id):
     result = engine.take_quiz(quiz_id)
 
 @cli.command()
-def history():
+@click.option('--page', default=1, type=click.IntRange(min=1), help='Page of history to show (default: 1)')
+@click.option('--since', type=click.DateTime(DATE_FORMATS), help='Only show entries since this date')
+@click.option('--topic', help='Only show quizzes whose topic contains this text')
+def history(page, since, topic):
     """View quiz and result history"""
-    storage = QuizStorage()
+    storage = current_storage()
     
     click.echo("\n📚 QUIZ HISTORY")
     click.echo("="*60)
     
-    quizzes = storage.get_recent_quizzes(10)
-    if not quizzes:
-        click.echo("📭 No quizzes found yet. Generate one with 'quiz generate'!")
+    try:
+        quiz_page = fetch_page(storage.query_quizzes, page, limit=10, since=since, topic=topic)
+        result_page = fetch_page(storage.query_results, page, limit=5, since=since, topic=topic)
+    except ValueError as e:
+        click.echo(f"❌ {e}")
+        return
+    
+    quizzes = quiz_page.items
+    if not quizzes and not result_page.items:
+        if page > 1 or since or topic:
+            click.echo("📭 No history matches these options.")
+        else:
+            click.echo("📭 No quizzes found yet. Generate one with 'quiz generate'!")
         return
     
-    click.echo("\n📝 Recent Quizzes:")
-    for quiz in quizzes:
-        results = storage.get_results_for_quiz(quiz.id)
-        best_score = max([r.score for r in results]) if results else 0
-        click.echo(f"  • {quiz.topic}")
-        click.echo(f"    ID: {quiz.id} | Questions: {len(quiz.questions)}")
-        click.echo(f"    Created: {quiz.created_at.strftime('%Y-%m-%d')}")
-        if results:
-            click.echo(f"    Attempts: {len(results)} | Best: {best_score}/{len(quiz.questions)}")
-        click.echo()
+    if quizzes:
+        click.echo("\n📝 Recent Quizzes:")
+        attempts = storage.get_attempt_summary(q.id for q in quizzes)
+        for quiz in quizzes:
+            summary = attempts.get(quiz.id)
+            click.echo(f"  • {quiz.topic}")
+            click.echo(f"    ID: {quiz.id} | Questions: {len(quiz.questions)}")
+            click.echo(f"    Created: {quiz.created_at.strftime('%Y-%m-%d')}")
+            if summary:
+                click.echo(f"    Attempts: {summary['attempts']} | Best: {summary['best']}/{len(quiz.questions)}")
+            click.echo()
     
     # Show recent results
-    results = storage.get_all_results()[-5:]  # Last 5 results
+    results = result_page.items
     if results:
         click.echo("\n📊 Recent Results:")
         click.echo("-"*40)
+        quizzes_by_id = storage.get_quizzes_by_ids(r.quiz_id for r in results)
         for result in results:
-            quiz = storage.get_quiz_by_id(result.quiz_id)
+            quiz = quizzes_by_id.get(result.quiz_id)
             topic = quiz.topic if quiz else "Unknown"
             click.echo(f"  • {topic}: {result.score}/{result.total_questions}")
             click.echo(f"    Completed: {result.completed_at.strftime('%Y-%m-%d %H:%M')}")
             click.echo()
+    
+    if quiz_page.next_cursor or result_page.next_cursor:
+        click.echo(f"➡️  More with --page {page + 1}")
 
 @cli.command()
 @click.option('--result-id', help='Specific result ID to review')
-def review(result_id):
+@click.option('--page', default=1, type=click.IntRange(min=1), help='Page of past results to choose from (default: 1)')
+@click.option('--since', type=click.DateTime(DATE_FORMATS), help='Only list results completed since this date')
+def review(result_id, page, since):
     """Review a past quiz with detailed explanations"""
-    engine = QuizEngine()
-    engine.review_quiz(result_id)
+    engine = QuizEngine(current_storage())
+    engine.review_quiz(result_id, page=page, since=since)
+
+@cli.command()
+@click.option('--count', default=10, help='Questions in this session (default: 10)')
+def practice(count):
+    """Practice questions you got wrong or answered slowly"""
+    engine = QuizEngine(current_storage())
+    outcome = engine.practice(count)
+    
+    if outcome is None:
+        next_due = engine.scheduler.next_due_time()
+        if next_due is None:
+            click.echo("\n📭 Nothing to practice yet. Questions you miss or answer slowly show up here!")
+        else:
+            click.echo(f"\n🎉 All caught up! Next review due "
+                       f"{datetime.fromtimestamp(next_due).strftime('%Y-%m-%d %H:%M')}")
+        return
+    
+    correct, answered = outcome
+    click.echo(f"\n🧠 Practice complete: {correct}/{answered} correct")
+    click.echo(f"📚 Questions in your review schedule: {engine.scheduler.size()}")
 
 @cli.command()
 def stats():
     """View application statistics"""
-    storage = QuizStorage()
+    storage = current_storage()
     stats = storage.get_stats()
     
     click.echo("\n📈 APPLICATION STATISTICS")
@@ -193,10 +316,7 @@ def stats():
     # Calculate average score if we have results
     results = storage.get_all_results()
     if results:
-        total_score = sum(r.score for r in results)
-        total_possible = sum(r.total_questions for r in results)
-        avg_percentage = (total_score / total_possible * 100) if total_possible > 0 else 0
-        click.echo(f"\n📊 Average Score: {avg_percentage:.1f}%")
+        click.echo(f"\n📊 Average Score: {stats['average_score'] or 0:.1f}%")
         
         # Find best and worst performances
         best_result = max(results, key=lambda r: r.score/r.total_questions) if results else None
@@ -207,8 +327,251 @@ def stats():
                 click.echo(f"🏆 Best Performance: {percentage:.1f}% on '{quiz.topic}'")
     
     click.echo(f"\n💾 Data file: {storage.filepath}")
+    if storage.user:
+        click.echo(f"👤 Results for '{storage.user}': {storage.results_filepath}")
     click.echo(f"📁 Data size: {stats['total_quizzes'] + stats['total_results']} records")
 
+@cli.command()
+@click.option('--answers', 'answers_file', required=True, type=click.Path(exists=True, dir_okay=False),
+              help='JSONL file with one {"quiz_id", "answers", "user"?} submission per line')
+@click.option('--dry-run', is_flag=True, help='Grade without saving results')
+def grade(answers_file, dry_run):
+    """Grade answer submissions in bulk"""
+    def read_submissions():
+        with open(answers_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    yield None  # Reported as an invalid submission
+    
+    engine = QuizEngine(current_storage())
+    start = time.perf_counter()
+    try:
+        results, errors = engine.grade_batch(read_submissions(), save=not dry_run)
+    except IOError as e:
+        click.echo(f"❌ Error: {e}")
+        return
+    elapsed = time.perf_counter() - start
+    
+    click.echo("\n🧮 BULK GRADING")
+    click.echo("="*60)
+    click.echo(f"✅ Graded: {len(results)}")
+    click.echo(f"❌ Rejected: {len(errors)}")
+    for position, reason in errors[:10]:
+        click.echo(f"   • Submission {position}: {reason}")
+    if len(errors) > 10:
+        click.echo(f"   ... and {len(errors) - 10} more")
+    
+    if results:
+        total_score = sum(r.score for r in results)
+        total_possible = sum(r.total_questions for r in results)
+        click.echo(f"\n📊 Average Score: {total_score / total_possible * 100:.1f}%")
+    rate = (len(results) + len(errors)) / elapsed if elapsed > 0 else 0
+    click.echo(f"⏱️  {elapsed:.2f}s ({rate:,.0f} submissions/s)")
+    if dry_run:
+        click.echo("💾 Results not saved (dry run)")
+    else:
+        users = {r.user_id for r in results}
+        click.echo(f"💾 Results saved to {len(users)} partition(s)" if users - {None}
+                   else f"💾 Results saved to {engine.storage.results_filepath}")
+
+@cli.command()
+@click.option('--quiz-id', required=True, help='Quiz ID to analyze')
+@click.option('--rebuild', is_flag=True, help='Recompute all statistics from the full history')
+def analyze(quiz_id, rebuild):
+    """Show per-question difficulty, discrimination and distractor analysis"""
+    storage = current_storage()
+    quiz = storage.get_quiz_by_id(quiz_id)
+    if not quiz:
+        click.echo(f"❌ Quiz with ID '{quiz_id}' not found!")
+        return
+    
+    analytics = ItemAnalytics(storage)
+    # Saved results are folded in as they arrive; only the first run reads the whole history
+    processed = analytics.recompute() if rebuild or not analytics.is_built() else 0
+    report = analytics.report(quiz_id)
+    
+    click.echo(f"\n🔬 ITEM ANALYSIS: {quiz.topic}")
+    click.echo("="*60)
+    if processed:
+        click.echo(f"🔄 Rebuilt statistics from {processed} results")
+    if not report:
+        click.echo("📭 No results for this quiz yet. Take it or grade some answers first!")
+        return
+    
+    click.echo(f"📊 Attempts: {report['attempts']} | Mean score: "
+               f"{report['mean_score']:.2f}/{len(quiz.questions)}")
+    
+    for i, (question, item) in enumerate(zip(quiz.questions, report['items']), 1):
+        discrimination = item['discrimination']
+        click.echo(f"\nQ{i}: {question.question_text}")
+        click.echo(f"   Difficulty (p): {item['p_value']:.2f} | Discrimination: "
+                   f"{'n/a' if discrimination is None else f'{discrimination:.2f}'}")
+        for j, (option, share) in enumerate(zip(question.options, item['option_frequencies'])):
+            marker = "✓" if j == question.correct_index else " "
+            click.echo(f"   {marker} {chr(65+j)}) {share*100:5.1f}%  {option}")
+        
+        if item['p_value'] < 0.2:
+            click.echo("   ⚠️ Very hard: few attempts answer correctly")
+        elif item['p_value'] > 0.9:
+            click.echo("   ⚠️ Very easy: nearly every attempt answers correctly")
+        if discrimination is not None and discrimination < 0.2:
+            click.echo("   ⚠️ Weak discrimination: does not separate strong and weak scorers")
+
+@cli.command()
+@click.option('--kind', type=click.Choice(['quizzes', 'results']), required=True, help='Records to export')
+@click.option('--output', required=True, type=click.Path(dir_okay=False), help='Destination file (.jsonl, .csv, optionally .gz)')
+@click.option('--format', 'fmt', type=click.Choice(['jsonl', 'csv']), help='File format (default: from file name)')
+@click.option('--gzip', 'compressed', is_flag=True, default=None, help='Compress with gzip (default: from file name)')
+def export(kind, output, fmt, compressed):
+    """Export quizzes or results to JSONL or CSV"""
+    from transfer import DataTransfer, detect_format
+    
+    detected_fmt, detected_gzip = detect_format(output)
+    transfer = DataTransfer(current_storage())
+    report = transfer.export_records(kind, output, fmt or detected_fmt,
+                                     detected_gzip if compressed is None else compressed)
+    
+    click.echo(f"📤 Exported {report.written} {kind} to {output}")
+    if report.users:
+        click.echo(f"👥 Included the shared results and {len(report.users)} user partitions: {', '.join(report.users)}")
+    click.echo(f"⏱️  {report.elapsed:.2f}s ({report.rate:,.0f} records/s)")
+
+@cli.command(name='import')
+@click.option('--kind', type=click.Choice(['quizzes', 'results']), required=True, help='Records to import')
+@click.option('--input', 'input_file', required=True, type=click.Path(exists=True, dir_okay=False), help='Source file (.jsonl, .csv, optionally .gz)')
+@click.option('--format', 'fmt', type=click.Choice(['jsonl', 'csv']), help='File format (default: from file name)')
+@click.option('--gzip', 'compressed', is_flag=True, default=None, help='Read gzip-compressed input (default: from file name)')
+@click.option('--batch-size', type=click.IntRange(min=1), help='Records saved per write (default: all at once)')
+@click.option('--on-collision', type=click.Choice(['skip', 'fail']), default='skip', help='What to do with quiz IDs that already exist')
+def import_(kind, input_file, fmt, compressed, batch_size, on_collision):
+    """Import quizzes or results from JSONL or CSV"""
+    from transfer import DataTransfer, detect_format
+    
+    detected_fmt, detected_gzip = detect_format(input_file)
+    transfer = DataTransfer(current_storage())
+    try:
+        report = transfer.import_records(kind, input_file, fmt or detected_fmt,
+                                         detected_gzip if compressed is None else compressed,
+                                         batch_size=batch_size, on_collision=on_collision)
+    except IOError as e:
+        click.echo(f"❌ Import stopped: {e}")
+        return
+    
+    if report.stopped:
+        click.echo(f"❌ Import stopped: {report.stopped}")
+        click.echo(f"📥 {report.written} {kind} from earlier batches were already saved" if report.written
+                   else "📥 Nothing was saved")
+        return
+    click.echo(f"📥 Imported {report.written} of {report.processed} {kind} from {input_file}")
+    if report.skipped:
+        click.echo(f"⏭️  Skipped {report.skipped} existing quiz IDs")
+    if report.errors:
+        click.echo(f"❌ Rejected {len(report.errors)} invalid records:")
+        for line_number, reason in report.errors[:10]:
+            click.echo(f"   • Line {line_number}: {reason}")
+        if len(report.errors) > 10:
+            click.echo(f"   ... and {len(report.errors) - 10} more")
+    click.echo(f"⏱️  {report.elapsed:.2f}s ({report.rate:,.0f} records/s)")
+
+@cli.command()
+@click.option('--host', default='127.0.0.1', help='Interface to bind (default: 127.0.0.1)')
+@click.option('--port', default=8000, help='Port to listen on (default: 8000)')
+@click.option('--max-concurrency', default=64, help='Requests handled at once (default: 64)')
+@click.option('--max-generations', default=4, help='Quiz generations run at once (default: 4)')
+def serve(host, port, max_concurrency, max_generations):
+    """Run the HTTP/JSON API server"""
+    from server import QuizServer
+    
+    server = QuizServer(host, port, max_concurrency=max_concurrency,
+                        max_generations=max_generations, storage=current_storage())
+    click.echo(f"🌐 Serving quiz API on http://{host}:{port} (Ctrl-C to stop)")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        click.echo("\n👋 Server stopped.")
+
+@cli.command()
+@click.option('--processes', default=2, help='Worker processes to run (default: 2)')
+@click.option('--visibility-timeout', default=300.0, help='Seconds before an unfinished job is handed to another worker (default: 300)')
+@click.option('--poll-interval', default=1.0, help='Seconds to wait when the queue is empty (default: 1)')
+@click.option('--drain', is_flag=True, help='Exit once no jobs are ready instead of waiting for more')
+def worker(processes, visibility_timeout, poll_interval, drain):
+    """Process queued quiz generations with a pool of worker processes"""
+    import multiprocessing
+    from jobs import JobQueue, run_worker
+    
+    try:
+        Config.validate()
+    except ValueError as e:
+        click.echo(f"❌ Error: {e}")
+        return
+    
+    storage = current_storage()
+    queue = JobQueue(storage=storage)
+    click.echo(f"⚙️  Starting {processes} worker(s) on {queue.path} (Ctrl-C to stop)")
+    pool = [
+        multiprocessing.Process(target=run_worker,
+                                args=(queue.path, storage.filepath, visibility_timeout, poll_interval, drain))
+        for _ in range(processes)
+    ]
+    for process in pool:
+        process.start()
+    try:
+        for process in pool:
+            process.join()
+    except KeyboardInterrupt:
+        # Workers get the same SIGINT and hand their current job back before exiting
+        for process in pool:
+            process.join()
+        click.echo("\n👋 Workers stopped.")
+        return
+    
+    click.echo("✅ Queue drained." if drain else "👋 Workers stopped.")
+
+@cli.command()
+@click.option('--id', 'job_id', help='Show a single job')
+@click.option('--retry-dead', is_flag=True, help='Requeue every dead-lettered job')
+def jobs(job_id, retry_dead):
+    """Show generation queue depth and job latency"""
+    from jobs import JobQueue
+    
+    queue = JobQueue(storage=current_storage())
+    if retry_dead:
+        click.echo(f"🔁 Requeued {queue.retry_dead()} dead job(s)")
+    
+    if job_id:
+        job = queue.get(job_id)
+        if not job:
+            click.echo(f"❌ Job with ID '{job_id}' not found")
+            return
+        click.echo(f"\n📬 Job {job.id}: '{job.topic}' ({job.num_questions} questions)")
+        click.echo(f"   Status: {job.status} (attempt {job.attempts}/{job.max_attempts})")
+        click.echo(f"   Queued: {datetime.fromtimestamp(job.created_at).strftime('%Y-%m-%d %H:%M:%S')}")
+        if job.finished_at:
+            click.echo(f"   Finished in {job.finished_at - job.created_at:.1f}s")
+        if job.quiz_id:
+            click.echo(f"   ✅ Quiz ID: {job.quiz_id}")
+        if job.error:
+            click.echo(f"   ⚠️  Last error: {job.error}")
+        return
+    
+    stats = queue.stats()
+    counts = stats["counts"]
+    click.echo("\n📬 GENERATION QUEUE")
+    click.echo("="*60)
+    click.echo(f"⏳ Queued: {counts['queued']}   ⚙️  Running: {counts['leased']}   "
+               f"✅ Done: {counts['done']}   💀 Dead: {counts['dead']}")
+    if stats["oldest_queued_age"] is not None:
+        click.echo(f"🕰️  Oldest queued job: {stats['oldest_queued_age']:.1f}s ago")
+    for label, key in (("Wait for a worker", "wait"), ("Queue to quiz", "latency")):
+        summary = stats[key]
+        if summary:
+            click.echo(f"⏱️  {label}: p50 {summary['p50']:.1f}s, p95 {summary['p95']:.1f}s, max {summary['max']:.1f}s")
+
 @cli.command()
 def help():
     """Show detailed help"""
@@ -216,26 +579,69 @@ def help():
     click.echo("""
     📖 COMMAND REFERENCE:
     
-    📝 generate [--topic TOPIC] [--questions N]
+    📝 generate [--topic TOPIC] [--questions N] [--async] [--priority N]
         Create a new quiz. If no topic is provided, you'll be prompted.
+        With --async the quiz is queued for 'quiz worker' and a job ID is returned.
         Example: quiz generate --topic "Space Exploration" --questions 10
     
-    🎯 take [--quiz-id ID]
+    🎯 take [--quiz-id ID] [--page N] [--since YYYY-MM-DD]
         Take a quiz. If no ID is provided, you can choose from recent quizzes.
         Example: quiz take --quiz-id abc123
     
-    📊 history
-        View your quiz and result history
+    📊 history [--page N] [--since YYYY-MM-DD] [--topic TEXT]
+        View your quiz and result history, newest first
+        Example: quiz history --since 2024-01-01 --page 2
     
-    📖 review [--result-id ID]
+    📖 review [--result-id ID] [--page N] [--since YYYY-MM-DD]
         Review a past quiz with detailed explanations
     
+    🧠 practice [--count N]
+        Spaced-repetition practice of questions you got wrong or answered slowly
+        Example: quiz practice --count 5
+    
     📈 stats
         View application statistics
     
+    🧮 grade --answers FILE [--dry-run]
+        Grade a JSONL file of {"quiz_id", "answers"} submissions without prompting
+        Example: quiz grade --answers answers.jsonl
+    
+    🔬 analyze --quiz-id ID [--rebuild]
+        Per-question difficulty, discrimination and distractor frequencies
+        Example: quiz analyze --quiz-id abc123
+    
+    📤 export --kind quizzes|results --output FILE [--format jsonl|csv] [--gzip]
+        Stream records to a JSONL or CSV file (gzip when the name ends in .gz)
+        Example: quiz export --kind results --output results.jsonl.gz
+    
+    📥 import --kind quizzes|results --input FILE [--on-collision skip|fail]
+        Validate and load records in one write; existing quiz IDs are skipped by default
+        Example: quiz import --kind quizzes --input quizzes.jsonl
+    
+    🌐 serve [--host HOST] [--port PORT] [--max-concurrency N] [--max-generations N]
+        Run a long-lived HTTP/JSON API for web frontends
+        Example: quiz serve --port 8000
+    
+    ⚙️  worker [--processes N] [--visibility-timeout SECONDS] [--drain]
+        Generate queued quizzes in parallel; failed jobs are retried, then dead-lettered
+        Example: quiz worker --processes 4
+    
+    📬 jobs [--id JOB] [--retry-dead]
+        Show queue depth and job latency, or the status of one job
+        Example: quiz jobs --id 1a2b3c4d
+    
     ❓ help
         Show this help message
     
+    👤 --user NAME (before any command, or set QUIZ_USER)
+        Keep your results, history and practice schedule in your own partition
+        Example: quiz --user alice take
+    
+    ⏱️  --profile [--profile-mode trace|sample] (before any command)
+        Report CPU hotspots, peak memory and top allocation sites to data/profiles/
+        Sample mode is low-overhead (peak RSS only) for long-running commands such as serve
+        Example: quiz --profile history
+    
     💡 TIPS:
     • Quiz IDs are short 8-character codes shown when you generate a quiz
     • You can review any quiz you've taken to see explanations
@@ -1,5 +1,5 @@
 from dataclasses import dataclass, asdict
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 import uuid
 
@@ -53,15 +53,22 @@ class QuizResult:
     score: int
     total_questions: int
     completed_at: datetime
+    answer_times: Optional[List[float]] = None  # seconds spent on each question, if timed
+    user_id: Optional[str] = None  # who took the quiz; None for single-user data
     
     def to_dict(self):
-        return {
+        data = {
             "quiz_id": self.quiz_id,
             "user_answers": self.user_answers,
             "score": self.score,
             "total_questions": self.total_questions,
             "completed_at": self.completed_at.isoformat()
         }
+        if self.answer_times is not None:
+            data["answer_times"] = self.answer_times
+        if self.user_id is not None:
+            data["user_id"] = self.user_id
+        return data
     
     @classmethod
     def from_dict(cls, data: dict):
@@ -70,5 +77,7 @@ class QuizResult:
             user_answers=data["user_answers"],
             score=data["score"],
             total_questions=data["total_questions"],
-            completed_at=datetime.fromisoformat(data["completed_at"])
+            completed_at=datetime.fromisoformat(data["completed_at"]),
+            answer_times=data.get("answer_times"),
+            user_id=data.get("user_id")
         )
\ No newline at end of file
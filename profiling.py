@@ -0,0 +1,199 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+TOP_ENTRIES = 15  # rows kept in the report file; the printed summary shows fewer
+
+class CommandProfiler:
+    """CPU and memory profile of one CLI command.
+
+    In "trace" mode every function call is timed with cProfile, which is exact but
+    slows call-heavy code down noticeably, and allocations are traced with
+    tracemalloc to find the peak and the lines holding the most memory. In "sample"
+    mode a background thread records the main thread's stack every few milliseconds
+    instead and only the process's peak RSS is reported, since tracing every
+    allocation would cost several times the command's own run time.
+    """
+
+    def __init__(self, mode: str = "trace", output_dir: str = "data/profiles",
+                 sample_interval: float = DEFAULT_SAMPLE_INTERVAL):
+        if mode not in ("trace", "sample"):
+            raise ValueError(f"Unknown profile mode '{mode}'")
+        self.mode = mode
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._self_samples: Counter = Counter()
+        self._total_samples: Counter = Counter()
+        self._sample_count = 0
+        self._started = 0.0
+
+    def start(self):
+        if self.mode == "trace":
+            tracemalloc.start()
+        self._started = time.perf_counter()
+        if self.mode == "trace":
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._sampler = threading.Thread(target=self._sample, args=(threading.main_thread().ident,),
+                                             name="profile-sampler", daemon=True)
+            self._sampler.start()
+
+    def stop(self, command: Optional[str] = None) -> Dict[str, Any]:
+        """Stop profiling, write the report file and return a summary of it."""
+        if self._profile is not None:
+            self._profile.disable()
+        else:
+            self._stop.set()
+            self._sampler.join()
+        stopped = time.perf_counter()
+        elapsed = stopped - self._started
+
+        allocations = []
+        if tracemalloc.is_tracing():
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            # Stop before grouping: otherwise every allocation the grouping makes is traced
+            # too, which made it over ten times slower on a large store
+            tracemalloc.stop()
+            # Skipping our own frames while reading the rows avoids filter_traces,
+            # which copies every trace
+            own_files = (tracemalloc.__file__, __file__)
+            for stat in snapshot.statistics("lineno"):
+                frame = stat.traceback[0]
+                if frame.filename in own_files:
+                    continue
+                allocations.append((f"{frame.filename}:{frame.lineno}", stat.size, stat.count))
+                if len(allocations) == TOP_ENTRIES:
+                    break
+        else:
+            peak = peak_rss()
+
+        summary = {
+            "command": command or "cli",
+            "mode": self.mode,
+            "elapsed": elapsed,
+            "peak_memory": peak,
+            "hotspots": self._hotspots(elapsed),
+            "allocations": allocations,
+        }
+        summary["report_path"] = self._write_report(summary, stopped)
+        return summary
+
+    def _sample(self, thread_id: int):
+        """Count the functions on the main thread's stack until stopped."""
+        while not self._stop.wait(self.sample_interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+            self._sample_count += 1
+            self._self_samples[self._frame_key(frame)] += 1
+            seen = set()
+            while frame is not None:
+                key = self._frame_key(frame)
+                if key not in seen:
+                    # Recursive functions count once per sample
+                    seen.add(key)
+                    self._total_samples[key] += 1
+                frame = frame.f_back
+
+    def _hotspots(self, elapsed: float) -> List[Tuple[str, float, float, int]]:
+        """(function, own seconds, cumulative seconds, calls or samples), by cumulative time."""
+        if self._profile is not None:
+            stats = pstats.Stats(self._profile).stats
+            rows = [
+                (self._format_location(filename, line, name), tottime, cumtime, calls)
+                for (filename, line, name), (_, calls, tottime, cumtime, _) in stats.items()
+            ]
+        else:
+            # Long C calls hold the GIL and delay samples, so spread the measured wall
+            # time over the samples actually taken rather than trusting the interval
+            per_sample = elapsed / self._sample_count if self._sample_count else 0.0
+            rows = [
+                (self._format_location(*key), self._self_samples[key] * per_sample,
+                 samples * per_sample, samples)
+                for key, samples in self._total_samples.items()
+            ]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows[:TOP_ENTRIES]
+
+    def _write_report(self, summary: Dict[str, Any], stopped: float) -> str:
+        """Write the report file. Sets summary["teardown"]: the seconds spent collecting
+        and formatting it after the command finished, which the wall time leaves out."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(self.output_dir, f"{summary['command']}-{stamp}.txt")
+
+        out = io.StringIO()
+        if self._profile is not None:
+            # Keep the raw stats too, for pstats or a visualiser
+            self._profile.dump_stats(path[:-len(".txt")] + ".prof")
+            out.write("CPU (cProfile, by cumulative time)\n")
+            pstats.Stats(self._profile, stream=out).sort_stats("cumulative").print_stats(TOP_ENTRIES * 2)
+        else:
+            out.write(f"CPU ({self._sample_count} samples, one every {self.sample_interval * 1000:g}ms or more, "
+                      f"by cumulative time)\n")
+            out.write(f"{'own s':>9} {'cum s':>9} {'samples':>8}  function\n")
+            for location, own, cumulative, samples in summary["hotspots"]:
+                out.write(f"{own:>9.3f} {cumulative:>9.3f} {samples:>8}  {location}\n")
+
+        if summary["allocations"]:
+            out.write("\nTop allocation sites (still allocated at exit)\n")
+            for location, size, count in summary["allocations"]:
+                out.write(f"{format_bytes(size):>10} {count:>8} blocks  {location}\n")
+
+        summary["teardown"] = time.perf_counter() - stopped
+        with open(path, 'w') as f:
+            f.write(f"Command: {summary['command']} ({summary['mode']} mode)\n")
+            f.write(f"Wall time: {summary['elapsed']:.3f}s (plus {summary['teardown']:.3f}s of profiler teardown)\n")
+            if summary["peak_memory"] is not None:
+                label = "Peak traced memory" if self.mode == "trace" else "Peak RSS"
+                f.write(f"{label}: {format_bytes(summary['peak_memory'])}\n")
+            f.write("\n")
+            f.write(out.getvalue())
+        return path
+
+    @staticmethod
+    def _frame_key(frame) -> Tuple[str, int, str]:
+        code = frame.f_code
+        return code.co_filename, code.co_firstlineno, code.co_name
+
+    @staticmethod
+    def _format_location(filename: str, line: int, name: str) -> str:
+        if filename == "~":
+            return name  # Built-in functions as reported by cProfile
+        if filename.startswith(os.getcwd()):
+            filename = os.path.relpath(filename)
+        return f"{filename}:{line}({name})"
+
+def peak_rss() -> Optional[int]:
+    """Peak resident set size of this process in bytes, where the platform reports it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
@@ -1,12 +1,17 @@
 import click
+import operator
+import time
 from datetime import datetime
-from typing import Optional, Tuple
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from models import Quiz, QuizResult
-from storage import QuizStorage
+from scheduler import ReviewScheduler, answer_quality
+from storage import QuizStorage, fetch_page, validate_user
 
 class QuizEngine:
-    def __init__(self):
-        self.storage = QuizStorage()
+    def __init__(self, storage: Optional[QuizStorage] = None):
+        self.storage = storage or QuizStorage()
+        self.scheduler = ReviewScheduler(self.storage)
     
     def take_quiz(self, quiz_id: str) -> Optional[QuizResult]:
         """Take a quiz interactively and return the result."""
@@ -23,45 +28,26 @@ class QuizEngine:
         click.echo(f"{'='*60}\n")
         
         user_answers = []
+        answer_times = []
         
         # Ask each question
         for i, question in enumerate(quiz.questions, 1):
             click.echo(f"\nQuestion {i}/{len(quiz.questions)}")
-            click.echo(f"{'─'*40}")
-            click.echo(f"❓ {question.question_text}")
-            click.echo()
-            
-            # Display options
-            for j, option in enumerate(question.options):
-                click.echo(f"   {chr(65+j)}) {option}")
-            
-            # Get user's answer
-            while True:
-                try:
-                    answer_input = click.prompt(f"\nYour answer (A/B/C/D)", type=str).upper().strip()
-                    if answer_input in ['A', 'B', 'C', 'D']:
-                        answer_index = ord(answer_input) - 65  # A=0, B=1, etc.
-                        user_answers.append(answer_index)
-                        break
-                    else:
-                        click.echo("❌ Please enter only A, B, C, or D")
-                except (KeyboardInterrupt, EOFError):
-                    click.echo("\n\n⚠️ Quiz cancelled!")
-                    return None
+            answer = self._ask_question(question)
+            if answer is None:
+                click.echo("\n\n⚠️ Quiz cancelled!")
+                return None
+            user_answers.append(answer[0])
+            answer_times.append(answer[1])
         
         # Calculate score
-        correct_answers = 0
-        for i, question in enumerate(quiz.questions):
-            if user_answers[i] == question.correct_index:
-                correct_answers += 1
-        
-        # Create result
         result = QuizResult(
             quiz_id=quiz_id,
             user_answers=user_answers,
-            score=correct_answers,
+            score=self.score_answers(quiz, user_answers),
             total_questions=len(quiz.questions),
-            completed_at=datetime.now()
+            completed_at=datetime.now(),
+            answer_times=answer_times
         )
         
         # Save result
@@ -72,20 +58,179 @@ class QuizEngine:
         
         return result
     
-    def review_quiz(self, result_id: Optional[str] = None):
-        """Review a specific quiz result or let user choose one."""
-        results = self.storage.get_all_results()
+    def practice(self, count: int = 10) -> Optional[Tuple[int, int]]:
+        """Run a spaced-repetition session over due questions.
+        Returns (correct, answered), or None if nothing is due."""
+        due = self.scheduler.next_due(count)
+        if not due:
+            return None
+        
+        quizzes = self.storage.get_quizzes_by_ids(item["quiz_id"] for item in due)
+        click.echo(f"\n{'='*60}")
+        click.echo(f"🧠 PRACTICE SESSION: {len(due)} question(s) due")
+        click.echo(f"{'='*60}")
+        
+        correct = answered = 0
+        for i, item in enumerate(due, 1):
+            quiz = quizzes.get(item["quiz_id"])
+            if not quiz or item["question_index"] >= len(quiz.questions):
+                continue
+            question = quiz.questions[item["question_index"]]
+            
+            click.echo(f"\nQuestion {i}/{len(due)} (from '{quiz.topic}')")
+            answer = self._ask_question(question)
+            if answer is None:
+                click.echo("\n\n⚠️ Practice cancelled!")
+                break
+            
+            # Each review is persisted as soon as it is made
+            is_correct = answer[0] == question.correct_index
+            self.scheduler.review(item["key"], answer_quality(is_correct, answer[1]))
+            answered += 1
+            if is_correct:
+                correct += 1
+                click.echo("✅ Correct!")
+            else:
+                click.echo(f"❌ Incorrect. The answer is {chr(65+question.correct_index)}) "
+                           f"{question.options[question.correct_index]}")
+            click.echo(f"💡 {question.explanation}")
+        
+        return correct, answered
+    
+    def submit_answers(self, quiz_id: str, user_answers: List[int]) -> Optional[QuizResult]:
+        """Score a complete set of answers without prompting and save the result.
+        Returns None if the quiz does not exist."""
+        quiz = self.storage.get_quiz_by_id(quiz_id)
+        if not quiz:
+            return None
+        
+        if len(user_answers) != len(quiz.questions):
+            raise ValueError(f"Expected {len(quiz.questions)} answers, got {len(user_answers)}")
+        for answer in user_answers:
+            if not isinstance(answer, int) or isinstance(answer, bool) or not 0 <= answer <= 3:
+                raise ValueError("Answers must be option indices between 0 and 3")
+        
+        result = QuizResult(
+            quiz_id=quiz_id,
+            user_answers=list(user_answers),
+            score=self.score_answers(quiz, user_answers),
+            total_questions=len(quiz.questions),
+            completed_at=datetime.now()
+        )
+        self.storage.save_result(result)
+        return result
+    
+    def grade_batch(self, submissions: Iterable[Dict[str, Any]], batch_size: int = 10000,
+                    save: bool = True) -> Tuple[List[QuizResult], List[Tuple[int, str]]]:
+        """Grade a stream of {"quiz_id", "answers", "completed_at"?, "user"?} submissions
+        without prompting. Returns (results, errors) where errors are (submission number,
+        reason) pairs. Results are written with a single commit per user partition;
+        submissions without a user belong to this engine's user."""
+        answer_keys: Dict[str, Tuple[int, ...]] = {}
+        results: List[QuizResult] = []
+        errors: List[Tuple[int, str]] = []
+        now = datetime.now()
+        
+        submissions = iter(submissions)
+        position = 0
+        while True:
+            batch = list(islice(submissions, batch_size))
+            if not batch:
+                break
+            
+            # Look up each quiz's answer key once, however many submissions reference it
+            new_ids = {s.get("quiz_id") for s in batch
+                       if isinstance(s, dict) and isinstance(s.get("quiz_id"), str)} - answer_keys.keys()
+            if new_ids:
+                for quiz_id, quiz in self.storage.get_quizzes_by_ids(new_ids).items():
+                    answer_keys[quiz_id] = tuple(q.correct_index for q in quiz.questions)
+            
+            for submission in batch:
+                position += 1
+                try:
+                    quiz_id, answers, completed_at = self._parse_submission(submission, answer_keys, now)
+                    user = submission.get("user", self.storage.user)
+                    if user is not None:
+                        validate_user(user)
+                except (ValueError, TypeError) as e:
+                    errors.append((position, str(e)))
+                    continue
+                
+                key = answer_keys[quiz_id]
+                results.append(QuizResult(
+                    quiz_id=quiz_id,
+                    user_answers=answers,
+                    score=sum(map(operator.eq, answers, key)),
+                    total_questions=len(key),
+                    completed_at=completed_at,
+                    user_id=user
+                ))
+        
+        if save and results:
+            by_user: Dict[Optional[str], List[QuizResult]] = {}
+            for result in results:
+                by_user.setdefault(result.user_id, []).append(result)
+            for user, user_results in by_user.items():
+                partition = self.storage if user == self.storage.user else self.storage.for_user(user)
+                if not partition.save_results(user_results):
+                    raise IOError(f"Failed to save graded results for {user or 'the shared store'}")
+        
+        return results, errors
+    
+    @staticmethod
+    def _parse_submission(submission: Any, answer_keys: Dict[str, Tuple[int, ...]],
+                          default_time: datetime) -> Tuple[str, List[int], datetime]:
+        """Validate one bulk submission against its quiz's answer key."""
+        if not isinstance(submission, dict):
+            raise ValueError("Submission must be a JSON object")
+        
+        quiz_id = submission.get("quiz_id")
+        if not isinstance(quiz_id, str):
+            raise ValueError("'quiz_id' must be a string")
+        if quiz_id not in answer_keys:
+            raise ValueError(f"Quiz with ID '{quiz_id}' not found")
+        
+        submitted = submission.get("answers")
+        if not isinstance(submitted, list):
+            raise ValueError("'answers' must be a list of option indices or letters")
+        
+        answers = []
+        for answer in submitted:
+            # Accept both option indices (0-3) and letters (A-D)
+            if isinstance(answer, str) and answer.strip().upper() in ('A', 'B', 'C', 'D'):
+                answer = ord(answer.strip().upper()) - 65
+            if not isinstance(answer, int) or isinstance(answer, bool) or not 0 <= answer <= 3:
+                raise ValueError(f"Invalid answer {answer!r}, expected 0-3 or A-D")
+            answers.append(answer)
         
-        if not results:
-            click.echo("📭 No quiz results found. Take a quiz first!")
-            return
+        expected = len(answer_keys[quiz_id])
+        if len(answers) != expected:
+            raise ValueError(f"Expected {expected} answers, got {len(answers)}")
         
+        completed_at = submission.get("completed_at")
+        if completed_at is None:
+            return quiz_id, answers, default_time
+        try:
+            return quiz_id, answers, datetime.fromisoformat(completed_at)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid completed_at {completed_at!r}")
+    
+    @staticmethod
+    def score_answers(quiz: Quiz, user_answers: List[int]) -> int:
+        """Count how many answers match the quiz's correct options."""
+        return sum(1 for question, answer in zip(quiz.questions, user_answers)
+                   if answer == question.correct_index)
+    
+    def review_quiz(self, result_id: Optional[str] = None, page: int = 1,
+                    since: Optional[datetime] = None):
+        """Review a specific quiz result or let user choose one."""
         if result_id:
             # Find specific result
-            result = next((r for r in results if r.quiz_id == result_id), None)
-            if not result:
+            matches = self.storage.query_results(limit=1, quiz_id=result_id, newest_first=False).items
+            if not matches:
                 click.echo(f"❌ Result with ID '{result_id}' not found!")
                 return
+            result = matches[0]
             
             quiz = self.storage.get_quiz_by_id(result.quiz_id)
             if quiz:
@@ -93,13 +238,21 @@ class QuizEngine:
             else:
                 click.echo(f"❌ Quiz for result '{result_id}' not found!")
         else:
+            recent_results = fetch_page(self.storage.query_results, page, limit=10, since=since).items
+            if not recent_results:
+                if page > 1 or since:
+                    click.echo("📭 No quiz results on this page.")
+                else:
+                    click.echo("📭 No quiz results found. Take a quiz first!")
+                return
+            
             # Let user choose from recent results
             click.echo("\n📊 Recent Quiz Results:")
             click.echo("="*60)
             
-            recent_results = results[-10:]  # Last 10 results
+            quizzes = self.storage.get_quizzes_by_ids(r.quiz_id for r in recent_results)
             for i, result in enumerate(recent_results, 1):
-                quiz = self.storage.get_quiz_by_id(result.quiz_id)
+                quiz = quizzes.get(result.quiz_id)
                 topic = quiz.topic if quiz else "Unknown Topic"
                 click.echo(f"{i}. {topic} - Score: {result.score}/{result.total_questions} "
                           f"({result.completed_at.strftime('%Y-%m-%d')})")
@@ -109,7 +262,7 @@ class QuizEngine:
                 if choice.lower() != 'q':
                     idx = int(choice) - 1
                     if 0 <= idx < len(recent_results):
-                        quiz = self.storage.get_quiz_by_id(recent_results[idx].quiz_id)
+                        quiz = quizzes.get(recent_results[idx].quiz_id)
                         if quiz:
                             self._display_detailed_review(quiz, recent_results[idx])
                         else:
@@ -119,6 +272,30 @@ class QuizEngine:
             except (ValueError, KeyboardInterrupt):
                 click.echo("\nReturning to main menu...")
     
+    def _ask_question(self, question) -> Optional[Tuple[int, float]]:
+        """Show one question and prompt until a valid answer is given.
+        Returns (answer index, seconds taken), or None if cancelled."""
+        click.echo(f"{'─'*40}")
+        click.echo(f"❓ {question.question_text}")
+        click.echo()
+        
+        # Display options
+        for j, option in enumerate(question.options):
+            click.echo(f"   {chr(65+j)}) {option}")
+        
+        # Get user's answer
+        start = time.monotonic()
+        while True:
+            try:
+                answer_input = click.prompt(f"\nYour answer (A/B/C/D)", type=str).upper().strip()
+                if answer_input in ['A', 'B', 'C', 'D']:
+                    answer_index = ord(answer_input) - 65  # A=0, B=1, etc.
+                    return answer_index, round(time.monotonic() - start, 2)
+                else:
+                    click.echo("❌ Please enter only A, B, C, or D")
+            except (KeyboardInterrupt, EOFError, click.Abort):
+                return None
+    
     def _display_results(self, quiz: Quiz, result: QuizResult):
         """Display quiz results with explanations."""
         click.echo(f"\n{'='*60}")
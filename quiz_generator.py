@@ -4,17 +4,18 @@ from config import Config
 from ai_service import AIService
 from models import Quiz, Question
 from storage import QuizStorage
+from typing import Optional
 import re
 
 class QuizGenerator:
-    def __init__(self):
+    def __init__(self, storage: Optional[QuizStorage] = None):
         Config.validate()
         self.ai_service = AIService(Config.GEMINI_API_KEY)
-        self.storage = QuizStorage()
+        self.storage = storage or QuizStorage()
     
-    def generate_quiz(self, topic: str, num_questions: int = 5) -> Quiz:
-        """Generate a new quiz on the given topic."""
-
+    @staticmethod
+    def validate_request(topic: str, num_questions: int = 5):
+        """Check a generation request without calling the AI. Raises ValueError."""
         # Basic topic validation
         if not topic or not topic.strip():
             raise ValueError("Topic cannot be empty")
@@ -27,6 +28,10 @@ class QuizGenerator:
     
         if len(topic) > 100:
             raise ValueError("Topic is too long (max 100 characters)")
+    
+    def generate_quiz(self, topic: str, num_questions: int = 5) -> Quiz:
+        """Generate a new quiz on the given topic."""
+        self.validate_request(topic, num_questions)
 
         #AI-powered topic validation
         print("🤔 Validating topic...")
@@ -0,0 +1,262 @@
+import heapq
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+from models import QuizResult
+from storage import QuizStorage, _file_lock
+
+SLOW_ANSWER_SECONDS = 20.0  # Correct answers slower than this still need practice
+FAST_ANSWER_SECONDS = 5.0
+MIN_EASINESS = 1.3
+DAY_SECONDS = 24 * 60 * 60
+COMPACT_SLACK = 1024  # Log entries tolerated beyond one per item before rewriting the snapshot
+MAX_TRACKED_PARTITIONS = 256  # Loaded schedules kept by track(); the least recently used are dropped
+
+def answer_quality(correct: bool, seconds: Optional[float]) -> int:
+    """Grade an answer on the SM-2 0-5 scale from correctness and response time."""
+    if not correct:
+        return 1
+    if seconds is None:
+        return 4
+    if seconds > SLOW_ANSWER_SECONDS:
+        return 3
+    return 5 if seconds < FAST_ANSWER_SECONDS else 4
+
+class ReviewScheduler:
+    """SM-2 spaced-repetition schedule over individual quiz questions.
+
+    Questions are enrolled when answered wrongly or slowly. Due items live in a
+    binary heap of (due time, version, key) entries; rescheduling pushes a new entry
+    and bumps the item's version, so stale entries are skipped lazily instead of
+    being searched for and removed.
+
+    On disk the schedule is a JSON snapshot plus an append-only log of changed
+    items next to the user's results, so recording a result writes only the items
+    it touched. Every access holds a thread lock and a file lock and first replays
+    log entries written by other schedulers (threads or processes) on the same file.
+    """
+
+    def __init__(self, storage: Optional[QuizStorage] = None):
+        self.storage = storage or QuizStorage()
+        # Each user's schedule lives next to their own results
+        directory = os.path.dirname(self.storage.results_filepath)
+        self.filepath = os.path.join(directory, "review_queue.json")
+        self.log_filepath = os.path.join(directory, "review_queue.log")
+        self._lock = threading.RLock()
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._heap: List[list] = []
+        self._snapshot_key = None
+        self._log_offset = 0
+        self._log_entries = 0
+        self._loaded = False
+
+    @staticmethod
+    def track(storage: QuizStorage):
+        """Keep the schedule of every partition up to date with the results saved
+        through `storage` or any partition derived from it. Dropping a schedule from
+        the cache is safe: the next one loaded for that partition reads it back from disk."""
+        schedulers: "OrderedDict[str, ReviewScheduler]" = OrderedDict()
+        lock = threading.Lock()
+
+        def on_results_saved(partition: QuizStorage, results: List[QuizResult], position: int):
+            with lock:
+                scheduler = schedulers.get(partition.results_filepath)
+                if scheduler is None:
+                    scheduler = schedulers[partition.results_filepath] = ReviewScheduler(partition)
+                    if len(schedulers) > MAX_TRACKED_PARTITIONS:
+                        schedulers.popitem(last=False)
+                else:
+                    schedulers.move_to_end(partition.results_filepath)
+            scheduler.record_results(results)
+
+        storage.add_result_listener(on_results_saved)
+
+    def record_results(self, results: Iterable[QuizResult]):
+        """Fold quiz results into the schedule, enrolling wrong or slow answers."""
+        results = list(results)
+        keys = self._answer_keys({r.quiz_id for r in results})
+        now = time.time()
+
+        with self._locked():
+            changed = []
+            for result in results:
+                key = keys.get(result.quiz_id)
+                if key is None:
+                    continue
+                times = result.answer_times or []
+                for index, (answer, correct_index) in enumerate(zip(result.user_answers, key)):
+                    seconds = times[index] if index < len(times) else None
+                    quality = answer_quality(answer == correct_index, seconds)
+                    item_key = f"{result.quiz_id}:{index}"
+                    if quality < 4 or item_key in self._items:
+                        self._review(item_key, quality, now)
+                        changed.append(item_key)
+            self._append(changed)
+
+    def next_due(self, count: int, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Get up to `count` due items, most overdue first, in O(count log n)."""
+        now = time.time() if now is None else now
+        with self._locked():
+            due, popped = [], []
+            while self._heap and len(due) < count and self._heap[0][0] <= now:
+                entry = heapq.heappop(self._heap)
+                item = self._items.get(entry[2])
+                if item is None or item["version"] != entry[1]:
+                    continue  # Superseded by a later reschedule
+                popped.append(entry)
+                due.append(dict(item, key=entry[2]))
+
+            # Peeking must not consume anything; reviews push fresh entries of their own
+            for entry in popped:
+                heapq.heappush(self._heap, entry)
+            return due
+
+    def review(self, item_key: str, quality: int):
+        """Reschedule one item after a practice answer of the given quality."""
+        with self._locked():
+            self._review(item_key, quality, time.time())
+            self._append([item_key])
+
+    def next_due_time(self) -> Optional[float]:
+        """Get when the earliest scheduled item becomes due, if any."""
+        with self._locked():
+            while self._heap:
+                due_at, version, key = self._heap[0]
+                item = self._items.get(key)
+                if item is not None and item["version"] == version:
+                    return due_at
+                heapq.heappop(self._heap)
+            return None
+
+    def size(self) -> int:
+        with self._locked():
+            return len(self._items)
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            if not os.path.isdir(os.path.dirname(self.filepath)):
+                # A partition nothing was ever saved to: there is no schedule to share yet
+                self._refresh()
+                yield
+                return
+            with _file_lock(f"{self.filepath}.lock"):
+                self._refresh()
+                yield
+
+    def _review(self, item_key: str, quality: int, now: float):
+        item = self._items.get(item_key)
+        if item is None:
+            quiz_id, _, index = item_key.rpartition(":")
+            item = {"quiz_id": quiz_id, "question_index": int(index), "easiness": 2.5,
+                    "interval": 0, "repetitions": 0, "due": now, "version": 0}
+            self._items[item_key] = item
+
+        if quality < 3:
+            # Lapse: start over and make the question due again right away
+            item["repetitions"] = 0
+            item["interval"] = 0
+        else:
+            item["repetitions"] += 1
+            if item["repetitions"] == 1:
+                item["interval"] = 1
+            elif item["repetitions"] == 2:
+                item["interval"] = 6
+            else:
+                item["interval"] = round(item["interval"] * item["easiness"])
+        item["easiness"] = max(MIN_EASINESS, item["easiness"] + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        item["due"] = now + item["interval"] * DAY_SECONDS
+        item["version"] += 1
+        heapq.heappush(self._heap, [item["due"], item["version"], item_key])
+
+    def _append(self, item_keys: List[str]):
+        """Log the latest state of changed items, compacting once the log outgrows the schedule."""
+        if not item_keys:
+            return
+        lines = "".join(json.dumps(dict(self._items[key], key=key)) + "\n"
+                        for key in dict.fromkeys(item_keys)).encode("utf-8")
+        os.makedirs(os.path.dirname(self.log_filepath), exist_ok=True)
+        with open(self.log_filepath, 'ab') as f:
+            f.write(lines)
+        self._log_offset += len(lines)
+        self._log_entries += lines.count(b"\n")
+        if self._log_entries > len(self._items) + COMPACT_SLACK:
+            self._compact()
+
+    def _compact(self):
+        """Rewrite the snapshot without stale heap entries and start an empty log."""
+        self._heap = [[item["due"], item["version"], key] for key, item in self._items.items()]
+        heapq.heapify(self._heap)
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.filepath), prefix="review_queue.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(json.dumps({"items": self._items, "heap": self._heap}))
+            os.replace(tmp_path, self.filepath)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        # Replaying the old log over the new snapshot is harmless (versions only move
+        # forward), so a crash before this truncation loses nothing
+        open(self.log_filepath, 'wb').close()
+        self._snapshot_key = self._file_key(self.filepath)
+        self._log_offset = self._log_entries = 0
+
+    def _refresh(self):
+        """Catch up with the files: reload after another compaction, then replay new log entries."""
+        snapshot_key = self._file_key(self.filepath)
+        if not self._loaded or snapshot_key != self._snapshot_key:
+            self._load_snapshot(snapshot_key)
+
+        try:
+            with open(self.log_filepath, 'rb') as f:
+                if f.seek(0, os.SEEK_END) < self._log_offset:
+                    # The log was removed or rewritten behind our back: start over
+                    self._load_snapshot(snapshot_key)
+                f.seek(self._log_offset)
+                pending = f.read()
+        except FileNotFoundError:
+            return
+
+        # Only apply complete lines; a writer may be mid-append
+        complete = pending[:pending.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            key = entry.pop("key")
+            current = self._items.get(key)
+            if current is None or entry["version"] > current["version"]:
+                self._items[key] = entry
+                heapq.heappush(self._heap, [entry["due"], entry["version"], key])
+            self._log_entries += 1
+        self._log_offset += len(complete)
+
+    def _load_snapshot(self, snapshot_key):
+        try:
+            with open(self.filepath, 'r') as f:
+                state = json.load(f)
+            self._items, self._heap = state["items"], state["heap"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            self._items, self._heap = {}, []
+        self._snapshot_key = snapshot_key
+        self._log_offset = self._log_entries = 0
+        self._loaded = True
+
+    def _answer_keys(self, quiz_ids) -> Dict[str, List[int]]:
+        quizzes = self.storage.get_quizzes_by_ids(quiz_ids)
+        return {quiz_id: [q.correct_index for q in quiz.questions] for quiz_id, quiz in quizzes.items()}
+
+    @staticmethod
+    def _file_key(path: str):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
@@ -0,0 +1,312 @@
+import asyncio
+import json
+import traceback
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from quiz_engine import QuizEngine
+from quiz_generator import QuizGenerator
+from storage import QuizStorage, validate_user
+
+MAX_BODY_SIZE = 1024 * 1024  # 1 MB is plenty for any quiz or answer payload
+MAX_CACHED_USERS = 256  # Per-user engines kept warm; the least recently used are dropped
+
+STATUS_TEXT = {
+    200: "OK",
+    201: "Created",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    414: "URI Too Long",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+class QuizServer:
+    """Asyncio HTTP/JSON server sharing one AI client and one cached storage."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8000,
+                 max_concurrency: int = 64, max_generations: int = 4,
+                 storage: Optional[QuizStorage] = None):
+        self.host = host
+        self.port = port
+        self.storage = storage or QuizStorage()
+        self.engine = QuizEngine(self.storage)
+        self._user_engines: "OrderedDict[str, QuizEngine]" = OrderedDict()
+        self.generator: Optional[QuizGenerator] = None
+        self.generator_error: Optional[str] = None
+        self._request_slots = asyncio.Semaphore(max_concurrency)
+        self._generation_slots = asyncio.Semaphore(max_generations)
+
+    async def serve_forever(self):
+        """Start listening and handle connections until cancelled."""
+        try:
+            # Build the AI client once so every generation reuses it
+            self.generator = QuizGenerator(self.storage)
+        except ValueError as e:
+            self.generator_error = str(e)
+            print(f"Warning: quiz generation disabled: {e}")
+
+        server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests on one connection, honouring HTTP keep-alive."""
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    self._write_response(writer, e.status, {"error": e.message}, keep_alive=False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+
+                method, target, headers, body, keep_alive = request
+                async with self._request_slots:
+                    status, payload = await self._dispatch(method, target, headers, body)
+
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        """Parse one HTTP/1.x request. Returns None when the client closed the connection."""
+        request_line = await self._read_line(reader, 414, "Request line too long")
+        if not request_line:
+            return None
+
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+
+        headers = {}
+        while True:
+            line = await self._read_line(reader, 431, "Request header line too long")
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length < 0:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length > MAX_BODY_SIZE:
+            raise HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.0":
+            keep_alive = connection == "keep-alive"
+        else:
+            keep_alive = connection != "close"
+
+        return method.upper(), target, headers, body, keep_alive
+
+    @staticmethod
+    async def _read_line(reader: asyncio.StreamReader, status: int, message: str) -> bytes:
+        """Read one CRLF-terminated line, rejecting lines longer than the stream limit."""
+        try:
+            return await reader.readline()
+        except (asyncio.LimitOverrunError, ValueError):
+            # readline() raises ValueError once a line exceeds the reader's 64 KB limit
+            raise HTTPError(status, message)
+
+    def _write_response(self, writer: asyncio.StreamWriter, status: int,
+                        payload: Any, keep_alive: bool):
+        """Serialize a JSON response onto the connection."""
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+
+    async def _dispatch(self, method: str, target: str, headers: Dict[str, str],
+                        body: bytes) -> Tuple[int, Any]:
+        """Route a request to its handler and turn failures into JSON errors."""
+        url = urlsplit(target)
+        parts = [p for p in url.path.split("/") if p]
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        user = headers.get("x-quiz-user")
+        try:
+            if parts == ["health"]:
+                self._require(method, "GET")
+                return 200, {"status": "ok", "generation": self.generator is not None}
+            if parts == ["quizzes"]:
+                self._require(method, "POST")
+                return await self._generate(self._parse_json(body))
+            if len(parts) == 2 and parts[0] == "quizzes":
+                self._require(method, "GET")
+                return await self._get_quiz(parts[1], query.get("include_answers") == "1")
+            if len(parts) == 3 and parts[0] == "quizzes" and parts[2] == "submit":
+                self._require(method, "POST")
+                return await self._submit(self._engine_for(user), parts[1], self._parse_json(body))
+            if parts == ["history"]:
+                self._require(method, "GET")
+                return await self._history(self._engine_for(user).storage,
+                                           self._parse_limit(query.get("limit"), 10),
+                                           query.get("quiz_cursor"), query.get("result_cursor"))
+            if parts == ["stats"]:
+                self._require(method, "GET")
+                return await self._stats(self._engine_for(user).storage)
+            raise HTTPError(404, f"No route for {url.path}")
+        except HTTPError as e:
+            return e.status, {"error": e.message}
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        except Exception:
+            # The details are for the operator, not the client
+            print(f"Error handling {method} {url.path}:")
+            traceback.print_exc()
+            return 500, {"error": "Internal server error"}
+
+    async def _generate(self, data: Dict[str, Any]) -> Tuple[int, Any]:
+        if self.generator is None:
+            raise HTTPError(503, self.generator_error or "Quiz generation is unavailable")
+
+        topic = data.get("topic")
+        num_questions = data.get("questions", 5)
+        if not isinstance(topic, str):
+            raise ValueError("'topic' must be a string")
+        if not isinstance(num_questions, int):
+            raise ValueError("'questions' must be an integer")
+
+        async with self._generation_slots:
+            quiz = await asyncio.to_thread(self.generator.generate_quiz, topic, num_questions)
+        return 201, quiz.to_dict()
+
+    async def _get_quiz(self, quiz_id: str, include_answers: bool) -> Tuple[int, Any]:
+        quiz = await asyncio.to_thread(self.storage.get_quiz_by_id, quiz_id)
+        if not quiz:
+            raise HTTPError(404, f"Quiz with ID '{quiz_id}' not found")
+
+        payload = quiz.to_dict()
+        if not include_answers:
+            # Hide the answer key from clients that are about to take the quiz
+            for question in payload["questions"]:
+                del question["correct_index"]
+                del question["explanation"]
+        return 200, payload
+
+    async def _submit(self, engine: QuizEngine, quiz_id: str, data: Dict[str, Any]) -> Tuple[int, Any]:
+        answers = data.get("answers")
+        if not isinstance(answers, list):
+            raise ValueError("'answers' must be a list of option indices")
+
+        result = await asyncio.to_thread(engine.submit_answers, quiz_id, answers)
+        if not result:
+            raise HTTPError(404, f"Quiz with ID '{quiz_id}' not found")
+
+        quiz = await asyncio.to_thread(self.storage.get_quiz_by_id, quiz_id)
+        payload = result.to_dict()
+        payload["review"] = [
+            {
+                "correct": answer == question.correct_index,
+                "correct_index": question.correct_index,
+                "explanation": question.explanation,
+            }
+            for question, answer in zip(quiz.questions, result.user_answers)
+        ]
+        return 201, payload
+
+    async def _history(self, storage: QuizStorage, limit: int, quiz_cursor: Optional[str],
+                       result_cursor: Optional[str]) -> Tuple[int, Any]:
+        def build():
+            quiz_page = storage.query_quizzes(limit=limit, cursor=quiz_cursor)
+            result_page = storage.query_results(limit=limit, cursor=result_cursor)
+            attempts = storage.get_attempt_summary(q.id for q in quiz_page.items)
+            topics = {quiz_id: q.topic for quiz_id, q in
+                      storage.get_quizzes_by_ids(r.quiz_id for r in result_page.items).items()}
+            return {
+                "quizzes": [
+                    {
+                        "id": q.id,
+                        "topic": q.topic,
+                        "questions": len(q.questions),
+                        "created_at": q.created_at.isoformat(),
+                        "attempts": attempts.get(q.id, {}).get("attempts", 0),
+                        "best_score": attempts.get(q.id, {}).get("best", 0),
+                    }
+                    for q in quiz_page.items
+                ],
+                "results": [
+                    dict(r.to_dict(), topic=topics.get(r.quiz_id, "Unknown"))
+                    for r in result_page.items
+                ],
+                "next_quiz_cursor": quiz_page.next_cursor,
+                "next_result_cursor": result_page.next_cursor,
+            }
+        return 200, await asyncio.to_thread(build)
+
+    async def _stats(self, storage: QuizStorage) -> Tuple[int, Any]:
+        return 200, await asyncio.to_thread(storage.get_stats)
+
+    def _engine_for(self, user: Optional[str]) -> QuizEngine:
+        """Get the engine for a user's partition (X-Quiz-User header). Only routes that
+        read or write results call this; a partition appears on disk with its first result."""
+        if not user or user == self.storage.user:
+            return self.engine
+        engine = self._user_engines.get(user)
+        if engine is None:
+            try:
+                validate_user(user)
+            except ValueError as e:
+                raise HTTPError(400, str(e))
+            engine = QuizEngine(self.storage.for_user(user))
+            self._user_engines[user] = engine
+            if len(self._user_engines) > MAX_CACHED_USERS:
+                self._user_engines.popitem(last=False)
+        else:
+            self._user_engines.move_to_end(user)
+        return engine
+
+    @staticmethod
+    def _require(method: str, expected: str):
+        if method != expected:
+            raise HTTPError(405, f"Method {method} not allowed, use {expected}")
+
+    @staticmethod
+    def _parse_json(body: bytes) -> Dict[str, Any]:
+        try:
+            data = json.loads(body or b"{}")
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            raise HTTPError(400, "Request body must be valid JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "Request body must be a JSON object")
+        return data
+
+    @staticmethod
+    def _parse_limit(value: Optional[str], default: int) -> int:
+        if value is None:
+            return default
+        try:
+            limit = int(value)
+        except ValueError:
+            raise HTTPError(400, "'limit' must be an integer")
+        if not 1 <= limit <= 100:
+            raise HTTPError(400, "'limit' must be between 1 and 100")
+        return limit
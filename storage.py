@@ -1,36 +1,74 @@
 import json
 import os
+import re
+import threading
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import Callable, Iterator, List, Optional, Dict, Any
 from models import Quiz, QuizResult
 
+try:
+    import fcntl
+except ImportError:  # Windows: writes are only serialized within one process
+    fcntl = None
+
+CHUNK_SIZE = 64 * 1024
+USER_PATTERN = re.compile(r"[A-Za-z0-9_-][A-Za-z0-9_.-]{0,63}")  # Used with fullmatch
+
+@dataclass
+class Page:
+    items: List[Any]
+    next_cursor: Optional[str]  # Pass back to fetch the following page; None on the last page
+
 class QuizStorage:
-    def __init__(self, filepath: str = "data/quizzes.json"):
+    """Quizzes live in one shared catalog file. Results live in the catalog file too
+    unless a user is given, in which case they go to that user's own partition
+    (data/users/<user>/results.json) so users never contend on the same file."""
+    
+    def __init__(self, filepath: str = "data/quizzes.json", user: Optional[str] = None):
         self.filepath = filepath
-        self._ensure_directory()
+        self.user = user
+        self._catalog = _DataFile(filepath)
+        if user is None:
+            self.results_filepath = filepath
+            self._results = self._catalog
+        else:
+            self.results_filepath = os.path.join(self.users_directory(), validate_user(user), "results.json")
+            self._results = _DataFile(self.results_filepath)
+        self._quiz_index: Dict[str, int] = {}
+        self._quiz_index_source = None
+        self._quiz_index_size = 0
+        self._result_listeners: List[Callable[["QuizStorage", List[QuizResult], int], None]] = []
     
-    def _ensure_directory(self):
-        """Create directory and file if they don't exist."""
-        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
-        if not os.path.exists(self.filepath):
-            initial_data = {
-                "quizzes": [],
-                "results": [],
-                "metadata": {
-                    "created_at": datetime.now().isoformat(),
-                    "total_quizzes": 0,
-                    "total_results": 0
-                }
-            }
-            self._save_data(initial_data)
+    def for_user(self, user: Optional[str]) -> "QuizStorage":
+        """Get a storage for another user's partition sharing this catalog (and its cache)
+        and this storage's result listeners."""
+        storage = QuizStorage(self.filepath, user)
+        storage._catalog = self._catalog
+        storage._result_listeners = self._result_listeners
+        if user is None:
+            storage._results = self._catalog
+        return storage
+    
+    def users_directory(self) -> str:
+        return os.path.join(os.path.dirname(self.filepath), "users")
+    
+    def list_users(self) -> List[str]:
+        """Get every user that has a results partition."""
+        try:
+            return sorted(name for name in os.listdir(self.users_directory())
+                          if os.path.exists(os.path.join(self.users_directory(), name, "results.json")))
+        except FileNotFoundError:
+            return []
     
     def save_quiz(self, quiz: Quiz) -> bool:
         """Save a quiz to storage."""
         try:
-            data = self._load_data()
-            data["quizzes"].append(quiz.to_dict())
-            data["metadata"]["total_quizzes"] = len(data["quizzes"])
-            self._save_data(data)
+            with self._catalog.transaction() as data:
+                data["quizzes"].append(quiz.to_dict())
+                data["metadata"]["total_quizzes"] = len(data["quizzes"])
             return True
         except Exception as e:
             print(f"Error saving quiz: {e}")
@@ -38,67 +76,476 @@ class QuizStorage:
     
     def save_result(self, result: QuizResult) -> bool:
         """Save a quiz result to storage."""
+        return self._save_results([result], "result")
+    
+    def save_quizzes(self, quizzes: List[Quiz]) -> bool:
+        """Save many quizzes in a single write."""
         try:
-            data = self._load_data()
-            data["results"].append(result.to_dict())
-            data["metadata"]["total_results"] = len(data["results"])
-            self._save_data(data)
+            with self._catalog.transaction() as data:
+                data["quizzes"].extend(q.to_dict() for q in quizzes)
+                data["metadata"]["total_quizzes"] = len(data["quizzes"])
             return True
         except Exception as e:
-            print(f"Error saving result: {e}")
+            print(f"Error saving quizzes: {e}")
             return False
     
+    def save_results(self, results: List[QuizResult]) -> bool:
+        """Save many quiz results in a single write."""
+        return self._save_results(results, "results")
+    
+    def add_result_listener(self, listener: Callable[["QuizStorage", List[QuizResult], int], None]):
+        """Call `listener(partition, results, position)` with every batch of results saved
+        through this storage or any partition derived from it with for_user. `position` is
+        the index of the first result in the partition's save order. Listeners run while
+        the partition is still locked, so they see its saves one at a time and in order."""
+        self._result_listeners.append(listener)
+    
     def get_quiz_by_id(self, quiz_id: str) -> Optional[Quiz]:
         """Get a specific quiz by ID."""
-        data = self._load_data()
-        for quiz_dict in data["quizzes"]:
-            if quiz_dict["id"] == quiz_id:
-                return Quiz.from_dict(quiz_dict)
-        return None
+        with self._catalog.lock:
+            data = self._catalog.load()
+            position = self._quiz_positions(data).get(quiz_id)
+            return Quiz.from_dict(data["quizzes"][position]) if position is not None else None
+    
+    def get_quizzes_by_ids(self, quiz_ids) -> Dict[str, Quiz]:
+        """Get several quizzes keyed by ID. Unknown IDs are left out."""
+        with self._catalog.lock:
+            data = self._catalog.load()
+            positions = self._quiz_positions(data)
+            return {quiz_id: Quiz.from_dict(data["quizzes"][positions[quiz_id]])
+                    for quiz_id in set(quiz_ids) if quiz_id in positions}
     
     def get_all_quizzes(self) -> List[Quiz]:
         """Get all quizzes."""
-        data = self._load_data()
+        data = self._catalog.load()
         return [Quiz.from_dict(q) for q in data["quizzes"]]
     
     def get_recent_quizzes(self, limit: int = 10) -> List[Quiz]:
         """Get most recent quizzes."""
-        data = self._load_data()
+        data = self._catalog.load()
         quizzes = [Quiz.from_dict(q) for q in data["quizzes"][-limit:]]
         return quizzes
     
     def get_all_results(self) -> List[QuizResult]:
         """Get all quiz results."""
-        data = self._load_data()
+        data = self._results.load()
         return [QuizResult.from_dict(r) for r in data["results"]]
     
+    def get_results_from(self, offset: int) -> List[QuizResult]:
+        """Get results saved after the first `offset` ones, in save order."""
+        data = self._results.load()
+        return [QuizResult.from_dict(r) for r in data["results"][offset:]]
+    
+    def count_results(self) -> int:
+        """Get the number of saved results."""
+        return len(self._results.load()["results"])
+    
     def get_results_for_quiz(self, quiz_id: str) -> List[QuizResult]:
         """Get all results for a specific quiz."""
-        data = self._load_data()
+        data = self._results.load()
         return [QuizResult.from_dict(r) for r in data["results"] if r["quiz_id"] == quiz_id]
     
+    def query_quizzes(self, limit: int = 10, cursor: Optional[str] = None, newest_first: bool = True,
+                      topic: Optional[str] = None, since: Optional[datetime] = None,
+                      until: Optional[datetime] = None) -> Page:
+        """Get one page of quizzes ordered by creation, optionally filtered by
+        topic (case-insensitive substring) and a created_at range [since, until)."""
+        needle = topic.lower() if topic else None
+        match = lambda q: needle in q["topic"].lower() if needle else True
+        return self._page(self._catalog, "quizzes", "created_at", Quiz.from_dict, limit, cursor,
+                          newest_first, since, until, match)
+    
+    def query_results(self, limit: int = 10, cursor: Optional[str] = None, newest_first: bool = True,
+                      quiz_id: Optional[str] = None, topic: Optional[str] = None,
+                      since: Optional[datetime] = None, until: Optional[datetime] = None) -> Page:
+        """Get one page of results ordered by completion, optionally filtered by
+        quiz, quiz topic and a completed_at range [since, until)."""
+        quiz_ids = None
+        if topic:
+            needle = topic.lower()
+            quiz_ids = {q["id"] for q in self._catalog.load()["quizzes"] if needle in q["topic"].lower()}
+        
+        def match(record):
+            if quiz_id is not None and record["quiz_id"] != quiz_id:
+                return False
+            return quiz_ids is None or record["quiz_id"] in quiz_ids
+        
+        return self._page(self._results, "results", "completed_at", QuizResult.from_dict, limit, cursor,
+                          newest_first, since, until, match)
+    
+    def get_attempt_summary(self, quiz_ids) -> Dict[str, Dict[str, int]]:
+        """Get {"attempts", "best"} per quiz ID without scanning results."""
+        with self._results.lock:
+            attempts = self._attempts(self._results.load())
+            return {quiz_id: dict(attempts[quiz_id]) for quiz_id in quiz_ids if quiz_id in attempts}
+    
+    def iter_quiz_dicts(self) -> Iterator[Dict[str, Any]]:
+        """Stream raw quiz records without loading the whole file."""
+        return self._catalog.iter_section("quizzes")
+    
+    def iter_result_dicts(self) -> Iterator[Dict[str, Any]]:
+        """Stream raw result records without loading the whole file."""
+        return self._results.iter_section("results")
+    
     def get_stats(self) -> Dict[str, Any]:
-        """Get storage statistics."""
-        data = self._load_data()
+        """Get storage statistics, including the average score (percent, or None
+        without results) from running totals rather than a scan of the results."""
+        quizzes = self._catalog.load()["quizzes"]
+        with self._results.lock:
+            data = self._results.load()
+            results = data["results"]
+            totals = self._score_totals(data)
+            return {
+                "total_quizzes": len(quizzes),
+                "total_results": len(results),
+                "recent_quizzes": len(quizzes[-5:]),
+                "recent_results": len(results[-5:]),
+                "average_score": totals["score"] / totals["possible"] * 100 if totals["possible"] > 0 else None
+            }
+    
+    def _save_results(self, results: List[QuizResult], noun: str) -> bool:
+        try:
+            if self.user is not None:
+                for result in results:
+                    result.user_id = self.user
+            position = None
+            
+            def notify(data):
+                self._notify_result_listeners(results, position)
+            
+            with self._results.transaction(on_commit=notify) as data:
+                attempts = self._attempts(data)
+                totals = self._score_totals(data)
+                records = [r.to_dict() for r in results]
+                position = len(data["results"])
+                data["results"].extend(records)
+                self._record_attempts(attempts, records)
+                self._record_scores(totals, records)
+                data["metadata"]["total_results"] = len(data["results"])
+            return True
+        except Exception as e:
+            print(f"Error saving {noun}: {e}")
+            return False
+    
+    def _notify_result_listeners(self, results: List[QuizResult], position: int):
+        for listener in self._result_listeners:
+            try:
+                listener(self, results, position)
+            except Exception as e:
+                # A failing listener must not turn a successful save into a failure
+                print(f"Warning: result listener failed: {e}")
+    
+    @staticmethod
+    def _page(source: "_DataFile", section: str, field: str, convert: Callable[[Dict[str, Any]], Any],
+              limit: int, cursor: Optional[str], newest_first: bool, since: Optional[datetime],
+              until: Optional[datetime], match: Callable[[Dict[str, Any]], bool]) -> Page:
+        """Walk records in `field` timestamp order from the cursor, converting only the page.
+        The [since, until) range is found by bisecting a sorted index, so narrow ranges
+        stop early however many records fall outside them."""
+        if limit < 1:
+            raise ValueError("Page limit must be at least 1")
+        
+        # Held for the whole walk: another reader's sorted_index() call extends the
+        # same index list in place, which would shift entries under the walk
+        with source.lock:
+            records = source.load()[section]
+            index = source.sorted_index(section, field)
+            lo = bisect_left(index, (timestamp_key(since),)) if since else 0
+            hi = bisect_left(index, (timestamp_key(until),)) if until else len(index)
+            
+            if cursor is None:
+                position = hi - 1 if newest_first else lo
+            else:
+                # The cursor names the next entry to visit, which stays put as records are appended
+                key, _, record_position = cursor.rpartition("|")
+                try:
+                    position = bisect_left(index, (key, int(record_position)))
+                except ValueError:
+                    raise ValueError(f"Invalid cursor '{cursor}'")
+                position = min(position, hi - 1) if newest_first else max(position, lo)
+            
+            step = -1 if newest_first else 1
+            items = []
+            while lo <= position < hi and len(items) < limit:
+                record = records[index[position][1]]
+                position += step
+                if match(record):
+                    items.append(convert(record))
+            
+            next_cursor = "%s|%d" % index[position] if lo <= position < hi else None
+        return Page(items=items, next_cursor=next_cursor)
+    
+    def _quiz_positions(self, data: Dict[str, Any]) -> Dict[str, int]:
+        """Map quiz IDs to list positions, extending the index as quizzes are appended."""
+        quizzes = data["quizzes"]
+        if self._quiz_index_source is not quizzes or self._quiz_index_size > len(quizzes):
+            self._quiz_index, self._quiz_index_source, self._quiz_index_size = {}, quizzes, 0
+        for position in range(self._quiz_index_size, len(quizzes)):
+            self._quiz_index.setdefault(quizzes[position]["id"], position)
+        self._quiz_index_size = len(quizzes)
+        return self._quiz_index
+    
+    def _attempts(self, data: Dict[str, Any]) -> Dict[str, Dict[str, int]]:
+        """Per-quiz attempt counts kept in metadata, backfilled once for older data files."""
+        if "attempts" not in data["metadata"]:
+            data["metadata"]["attempts"] = {}
+            self._record_attempts(data["metadata"]["attempts"], data["results"])
+        return data["metadata"]["attempts"]
+    
+    def _score_totals(self, data: Dict[str, Any]) -> Dict[str, int]:
+        """Running score and possible-score sums kept in metadata, backfilled like attempts."""
+        if "score_totals" not in data["metadata"]:
+            data["metadata"]["score_totals"] = {"score": 0, "possible": 0}
+            self._record_scores(data["metadata"]["score_totals"], data["results"])
+        return data["metadata"]["score_totals"]
+    
+    @staticmethod
+    def _record_scores(totals: Dict[str, int], records: List[Dict[str, Any]]):
+        for record in records:
+            totals["score"] += record["score"]
+            totals["possible"] += record["total_questions"]
+    
+    @staticmethod
+    def _record_attempts(attempts: Dict[str, Dict[str, int]], records: List[Dict[str, Any]]):
+        for record in records:
+            summary = attempts.setdefault(record["quiz_id"], {"attempts": 0, "best": 0})
+            summary["attempts"] += 1
+            summary["best"] = max(summary["best"], record["score"])
+
+class _DataFile:
+    """One JSON data file with an in-memory cache and locked, atomic writes."""
+    
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.lock = threading.RLock()
+        self._cache: Optional[Dict[str, Any]] = None
+        self._cache_key = None
+        self._sorted_indexes: Dict[tuple, Dict[str, Any]] = {}
+    
+    @staticmethod
+    def _initial_data() -> Dict[str, Any]:
         return {
-            "total_quizzes": len(data["quizzes"]),
-            "total_results": len(data["results"]),
-            "recent_quizzes": len(data["quizzes"][-5:]),
-            "recent_results": len(data["results"][-5:])
+            "quizzes": [],
+            "results": [],
+            "metadata": {
+                "created_at": datetime.now().isoformat(),
+                "total_quizzes": 0,
+                "total_results": 0
+            }
         }
     
-    def _load_data(self) -> Dict[str, Any]:
-        """Load data from JSON file."""
+    @contextmanager
+    def transaction(self, on_commit: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """Load, modify and save the data while holding both the thread and file locks,
+        so concurrent writers (including other processes) never lose each other's updates.
+        `on_commit` runs after the save, before the locks are released."""
+        # The file (and its directory) only comes into existence with the first write
+        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+        with self.lock, _file_lock(f"{self.filepath}.lock"):
+            data = self.load()
+            try:
+                yield data
+                self.save(data)
+            except BaseException:
+                self.invalidate()
+                raise
+            if on_commit is not None:
+                on_commit(data)
+    
+    def load(self) -> Dict[str, Any]:
+        """Load data from JSON file, reusing the cached copy while the file is unchanged."""
+        with self.lock:
+            try:
+                key = self._file_key()
+                if self._cache is not None and key == self._cache_key:
+                    return self._cache
+                with open(self.filepath, 'r') as f:
+                    data = json.load(f)
+            except FileNotFoundError:
+                # Nothing saved yet; reading must not create the file
+                self._cache, self._cache_key = None, None
+                return self._initial_data()
+            self._cache, self._cache_key = data, key
+            return data
+    
+    def save(self, data: Dict[str, Any]):
+        """Save data to JSON file atomically so readers never see a partial write."""
+        with self.lock:
+            os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+            tmp_path = f"{self.filepath}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.filepath)
+            self._cache, self._cache_key = data, self._file_key()
+    
+    def sorted_index(self, section: str, field: str) -> List[tuple]:
+        """(normalized timestamp, position) pairs for a section's records, sorted by time.
+        Kept for the cached data and extended in place as records are appended."""
+        with self.lock:
+            records = self.load()[section]
+            entry = self._sorted_indexes.get((section, field))
+            if entry is None or entry["source"] is not records or entry["size"] > len(records):
+                entry = {"source": records, "size": 0, "index": []}
+                self._sorted_indexes[(section, field)] = entry
+            
+            index, size = entry["index"], entry["size"]
+            new = [(timestamp_key(records[p][field]), p) for p in range(size, len(records))]
+            if len(new) > 64:
+                index.extend(new)
+                index.sort()
+            else:
+                for pair in new:
+                    insort(index, pair)
+            entry["size"] = len(records)
+            return index
+    
+    def iter_section(self, section: str) -> Iterator[Dict[str, Any]]:
+        """Yield the records of one top-level list, reusing the cache if it is current."""
+        with self.lock:
+            try:
+                current = self._cache is not None and self._file_key() == self._cache_key
+            except FileNotFoundError:
+                return
+            cached = self._cache if current else None
+        if cached is not None:
+            yield from cached[section]
+            return
+        
         try:
-            with open(self.filepath, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            # If file is corrupted, reinitialize
-            self._ensure_directory()
-            with open(self.filepath, 'r') as f:
-                return json.load(f)
-    
-    def _save_data(self, data: Dict[str, Any]):
-        """Save data to JSON file."""
-        with open(self.filepath, 'w') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
\ No newline at end of file
+            f = open(self.filepath, 'r')
+        except FileNotFoundError:
+            return
+        with f:
+            yield from _stream_section(f, section)
+    
+    def invalidate(self):
+        """Drop the cached data so the next read goes back to disk."""
+        with self.lock:
+            self._cache, self._cache_key = None, None
+    
+    def _file_key(self):
+        """Identify the current file version; atomic replaces always change the inode."""
+        stat = os.stat(self.filepath)
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+@contextmanager
+def _file_lock(path: str):
+    """Hold an exclusive advisory lock on `path` (no-op where fcntl is unavailable)."""
+    if fcntl is None:
+        yield
+        return
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def validate_user(user: str) -> str:
+    """Check a user name is safe to use as a partition directory."""
+    if not isinstance(user, str) or not USER_PATTERN.fullmatch(user):
+        raise ValueError("User names may only contain letters, digits, '.', '_' and '-', "
+                         "must not start with '.' and are at most 64 characters")
+    return user
+
+def timestamp_key(value) -> str:
+    """Sortable form of a datetime or ISO timestamp: local time, fixed precision and 'T'
+    separator, so '2024-01-05 10:00' and '2024-01-05T10:00+00:00' order correctly.
+    Unparseable values sort first."""
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            return ""
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value.isoformat(timespec="microseconds")
+
+def fetch_page(query: Callable[..., Page], page: int, **filters) -> Page:
+    """Get the 1-based `page` of a query_* method by following cursors."""
+    if page < 1:
+        raise ValueError("Page number must be at least 1")
+    cursor = None
+    for _ in range(page - 1):
+        cursor = query(cursor=cursor, **filters).next_cursor
+        if cursor is None:
+            return Page(items=[], next_cursor=None)
+    return query(cursor=cursor, **filters)
+
+def _stream_section(f, section: str) -> Iterator[Any]:
+    """Incrementally parse a top-level JSON object, yielding the items of one list member.
+
+    Only one item (plus a read chunk) is held in memory at a time; other members
+    are skipped item by item the same way.
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+    
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            eof = True
+        buf, pos = buf[pos:] + chunk, 0
+    
+    def peek() -> str:
+        # Skip whitespace and return the next significant character ("" at end of file)
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf) or eof:
+                return buf[pos:pos + 1]
+            fill()
+    
+    def expect(char: str):
+        nonlocal pos
+        if peek() != char:
+            raise ValueError(f"Malformed data file: expected '{char}'")
+        pos += 1
+    
+    def decode() -> Any:
+        # Decode the next value, reading more input until it is complete
+        nonlocal pos
+        peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+                # A value ending exactly at the buffer edge (e.g. a number) may continue
+                if end < len(buf) or eof:
+                    pos = end
+                    return value
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            fill()
+    
+    def iter_list() -> Iterator[Any]:
+        nonlocal pos
+        expect('[')
+        if peek() == ']':
+            pos += 1
+            return
+        while True:
+            yield decode()
+            if peek() == ',':
+                pos += 1
+                continue
+            expect(']')
+            return
+    
+    expect('{')
+    while peek() not in ('}', ''):
+        if buf[pos] == ',':
+            pos += 1
+            continue
+        key = decode()
+        expect(':')
+        if peek() == '[':
+            if key == section:
+                yield from iter_list()
+                return
+            for _ in iter_list():
+                pass
+        else:
+            decode()
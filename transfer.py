@@ -0,0 +1,222 @@
+import csv
+import gzip
+import itertools
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from models import Quiz, QuizResult
+from quiz_engine import QuizEngine
+from storage import QuizStorage, validate_user
+
+KINDS = ("quizzes", "results")
+FORMATS = ("jsonl", "csv")
+
+# CSV columns per record kind; list-valued fields are stored as JSON strings
+CSV_FIELDS = {
+    "quizzes": ["id", "topic", "created_at", "questions"],
+    "results": ["quiz_id", "user_id", "score", "total_questions", "completed_at", "user_answers", "answer_times"],
+}
+CSV_JSON_FIELDS = {"questions", "user_answers", "answer_times"}
+CSV_INT_FIELDS = {"score", "total_questions"}
+CSV_OPTIONAL_FIELDS = {"user_id", "answer_times"}  # Written as empty cells when unset
+
+@dataclass
+class TransferReport:
+    processed: int = 0
+    written: int = 0
+    skipped: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+    elapsed: float = 0.0
+    stopped: Optional[str] = None  # Why the import ended early, if it did
+    users: List[str] = field(default_factory=list)  # User partitions an export included
+
+    @property
+    def rate(self) -> float:
+        """Records processed per second."""
+        return self.processed / self.elapsed if self.elapsed > 0 else 0.0
+
+def detect_format(path: str) -> Tuple[str, bool]:
+    """Guess (format, gzipped) from a file name like 'results.csv.gz'."""
+    name = path.lower()
+    compressed = name.endswith(".gz")
+    if compressed:
+        name = name[:-3]
+    fmt = "csv" if name.endswith(".csv") else "jsonl"
+    return fmt, compressed
+
+class DataTransfer:
+    """Stream quizzes and results between the store and JSONL/CSV files."""
+
+    def __init__(self, storage: Optional[QuizStorage] = None):
+        self.storage = storage or QuizStorage()
+
+    def export_records(self, kind: str, path: str, fmt: str = "jsonl",
+                       compressed: bool = False) -> TransferReport:
+        """Write every record of `kind` to `path`, one at a time. Without a user, results
+        cover the shared store followed by every user partition, so the export is a
+        complete backup that import routes back to the same partitions."""
+        report = TransferReport()
+        start = time.perf_counter()
+        if kind == "quizzes":
+            records = self.storage.iter_quiz_dicts()
+        elif self.storage.user is None:
+            report.users = self.storage.list_users()
+            records = itertools.chain(self.storage.iter_result_dicts(), *(
+                self.storage.for_user(user).iter_result_dicts() for user in report.users))
+        else:
+            records = self.storage.iter_result_dicts()
+
+        with self._open(path, "w", compressed) as f:
+            if fmt == "csv":
+                writer = csv.DictWriter(f, fieldnames=CSV_FIELDS[kind], extrasaction="ignore")
+                writer.writeheader()
+                for record in records:
+                    writer.writerow({k: json.dumps(v) if k in CSV_JSON_FIELDS else v
+                                     for k, v in record.items()})
+                    report.processed += 1
+            else:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False))
+                    f.write("\n")
+                    report.processed += 1
+
+        report.written = report.processed
+        report.elapsed = time.perf_counter() - start
+        return report
+
+    def import_records(self, kind: str, path: str, fmt: str = "jsonl", compressed: bool = False,
+                       batch_size: Optional[int] = None, on_collision: str = "skip") -> TransferReport:
+        """Validate and load records of `kind` from `path`.
+
+        Every save rewrites the whole data file, so by default all valid records are
+        saved in one write (per user partition) after the file has been read; a
+        batch_size only bounds how much is lost if the import dies part-way.
+        Quizzes whose ID already exists (in the store or earlier in the file) are
+        skipped or, with on_collision="fail", stop the import before anything
+        further is written; report.stopped says why and report.written counts the
+        records saved by earlier batches. Results must reference a known quiz and
+        carry one answer (0-3) per question and a score within its question count.
+        """
+        report = TransferReport()
+        start = time.perf_counter()
+        # Quiz IDs seen so far, with each quiz's answer key to check results against
+        answer_keys = {q["id"]: tuple(question["correct_index"] for question in q["questions"])
+                       for q in self.storage.iter_quiz_dicts()}
+        batch: List[Any] = []
+
+        def flush():
+            if not batch:
+                return
+            if kind == "quizzes":
+                if not self.storage.save_quizzes(batch):
+                    raise IOError(f"Failed to save a batch of {len(batch)} quizzes")
+            else:
+                # Results go back to the partition of the user who produced them
+                by_user: Dict[Optional[str], List[QuizResult]] = {}
+                for result in batch:
+                    by_user.setdefault(result.user_id or self.storage.user, []).append(result)
+                for user, results in by_user.items():
+                    partition = self.storage if user == self.storage.user else self.storage.for_user(user)
+                    if not partition.save_results(results):
+                        raise IOError(f"Failed to save a batch of {len(results)} results")
+            report.written += len(batch)
+            batch.clear()
+
+        try:
+            for line_number, record in self._read(path, fmt, compressed):
+                report.processed += 1
+                try:
+                    if not isinstance(record, dict):
+                        raise ValueError("not a valid record")
+                    if kind == "quizzes":
+                        item = Quiz.from_dict(record)
+                        if item.id in answer_keys:
+                            if on_collision == "fail":
+                                report.stopped = f"Line {line_number}: quiz ID '{item.id}' already exists"
+                                batch.clear()
+                                break
+                            report.skipped += 1
+                            continue
+                        answer_keys[item.id] = tuple(q.correct_index for q in item.questions)
+                    else:
+                        item = QuizResult.from_dict(record)
+                        self._check_result(item, answer_keys)
+                        if item.user_id is not None:
+                            validate_user(item.user_id)
+                except (KeyError, TypeError, ValueError, AttributeError) as e:
+                    detail = f"missing field {e}" if isinstance(e, KeyError) else str(e)
+                    report.errors.append((line_number, detail))
+                    continue
+
+                batch.append(item)
+                if batch_size is not None and len(batch) >= batch_size:
+                    flush()
+            flush()
+        finally:
+            report.elapsed = time.perf_counter() - start
+        return report
+
+    @staticmethod
+    def _check_result(result: QuizResult, answer_keys: Dict[str, Tuple[int, ...]]):
+        """Reject results that would break stats or grading once stored."""
+        if not isinstance(result.user_answers, list):
+            raise ValueError("'user_answers' must be a list of option indices 0-3")
+        _, answers, _ = QuizEngine._parse_submission(
+            {"quiz_id": result.quiz_id, "answers": result.user_answers}, answer_keys, result.completed_at)
+        if answers != result.user_answers:
+            raise ValueError("'user_answers' must be a list of option indices 0-3")
+
+        for name in ("score", "total_questions"):
+            value = getattr(result, name)
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise ValueError(f"'{name}' must be an integer, got {value!r}")
+        expected = len(answer_keys[result.quiz_id])
+        if result.total_questions != expected:
+            raise ValueError(f"'total_questions' is {result.total_questions} but the quiz has {expected} questions")
+        if not 0 <= result.score <= result.total_questions:
+            raise ValueError(f"'score' {result.score} is outside 0-{result.total_questions}")
+
+        times = result.answer_times
+        if times is not None and (not isinstance(times, list) or not all(
+                isinstance(t, (int, float)) and not isinstance(t, bool) and t >= 0 for t in times)):
+            raise ValueError("'answer_times' must be a list of non-negative seconds")
+
+    def _read(self, path: str, fmt: str, compressed: bool) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Yield (line number, record) pairs; unparseable lines yield a non-dict record."""
+        with self._open(path, "r", compressed) as f:
+            if fmt == "csv":
+                reader = csv.DictReader(f)
+                for row in reader:
+                    yield reader.line_num, self._from_csv_row(row)
+            else:
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        yield line_number, json.loads(line)
+                    except json.JSONDecodeError:
+                        yield line_number, None
+
+    @staticmethod
+    def _from_csv_row(row: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        record: Dict[str, Any] = {}
+        try:
+            for key, value in row.items():
+                if key in CSV_OPTIONAL_FIELDS and value == "":
+                    continue
+                if key in CSV_JSON_FIELDS:
+                    record[key] = json.loads(value)
+                elif key in CSV_INT_FIELDS:
+                    record[key] = int(value)
+                else:
+                    record[key] = value
+        except (TypeError, ValueError):
+            return None
+        return record
+
+    @staticmethod
+    def _open(path: str, mode: str, compressed: bool):
+        if compressed:
+            return gzip.open(path, f"{mode}t", encoding="utf-8", newline="")
+        return open(path, mode, encoding="utf-8", newline="")